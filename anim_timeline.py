@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# Decimal Blocks 3D — 브라우저 재생용 애니메이션 타임라인
+# - arith_steps의 단계를 서버 루프(time.sleep)와 같은 순서·타이밍의 이벤트 목록으로 변환
+# - 이벤트: 패널(스프라이트) 교체, 숫자 교체, 말풍선, 효과음 — 모두 시작 기준 ms 오프셋
+# - timeline_html(): 타임라인 + 필요한 스프라이트/소리를 한 번에 담은 HTML(컴포넌트용)
+
+import base64
+import html
+import json
+from typing import Dict, List, Tuple
+
+from arith_steps import PLACES, ROWS, add_steps, sub_steps
+from blocks3d import COLOR_FLASH, panel_png, sprite_key
+
+# ────────── 타이밍(서버 루프와 공용) ──────────
+STEP_DELAY_MOVE     = 0.30
+BLINK_CYCLES        = 2
+BLINK_INTERVAL      = 0.60
+CARRY_PAUSE_BEFORE  = 0.70
+CARRY_PAUSE_AFTER   = 0.70
+ALERT_SECONDS       = 4.0
+
+class Timeline:
+    """화면 상태 변화를 시각(ms)과 함께 기록한다. 직전과 같은 상태는 기록하지 않는다."""
+
+    def __init__(self):
+        self.ms = 0
+        self.events: List[dict] = []
+        self.sprites: Dict[tuple, str] = {}    # sprite_key → "s0", "s1", ...
+        self.sounds: set = set()
+        self._last: Dict[Tuple[str, str], object] = {}
+
+    def wait(self, seconds: float):
+        self.ms += int(round(seconds * 1000))
+
+    def _emit(self, **ev):
+        ev["at"] = self.ms
+        self.events.append(ev)
+
+    def panel(self, slot: str, count: int, color=None, label=None):
+        key = sprite_key(slot[1], count, color, label)
+        if self._last.get(("p", slot)) == key:
+            return
+        self._last[("p", slot)] = key
+        sid = self.sprites.setdefault(key, f"s{len(self.sprites)}")
+        self._emit(op="panel", slot=slot, sprite=sid)
+
+    def digit(self, slot: str, val: int):
+        if self._last.get(("d", slot)) == val:
+            return
+        self._last[("d", slot)] = val
+        self._emit(op="digit", slot=slot, val=val)
+
+    def alert(self, text: str, seconds: float = ALERT_SECONDS):
+        self._emit(op="alert", html=text)
+        self.wait(seconds)
+        self._emit(op="alert", html=None)
+
+    def sound(self, name: str):
+        self.sounds.add(name)
+        self._emit(op="sound", id=name)
+
+    # ── 서버 루프의 render_all_* / flash_* 와 같은 순서·타이밍 ──
+    def render_all(self, state, label=None):
+        for row, digits in zip(ROWS, state):
+            for p, n in zip(PLACES, digits):
+                slot = row + p.upper()
+                self.digit(slot, n)
+                self.panel(slot, n, label=label if row == "R" and p != "k" else None)
+
+    def blink(self, slot, count, interval=BLINK_INTERVAL):
+        for _ in range(BLINK_CYCLES):
+            self.panel(slot, count, color=COLOR_FLASH); self.wait(interval)
+            self.panel(slot, count);                    self.wait(interval)
+
+    def flash_carry(self, p, o_now):
+        """결과판의 p자리 10개를 깜빡인 뒤(일의 자리로 올라가면 큐브도) 변환음."""
+        self.wait(CARRY_PAUSE_BEFORE)
+        self.blink("R" + p.upper(), 10)
+        if p == "t":
+            for _ in range(BLINK_CYCLES):
+                self.panel("RO", o_now + 1, color=COLOR_FLASH); self.wait(0.25)
+                self.panel("RO", o_now);                        self.wait(0.25)
+        self.wait(CARRY_PAUSE_AFTER); self.sound("trans")
+
+    def flash_borrow(self, src, dst):
+        """결과판 src자리 1개 → dst자리 10개 변환 깜빡임."""
+        self.wait(CARRY_PAUSE_BEFORE)
+        self.blink("R" + src.upper(), 1)
+        self.blink("R" + dst.upper(), 10)
+        self.wait(CARRY_PAUSE_AFTER); self.sound("trans")
+
+def steps_timeline(a_digits, b_digits, steps) -> Timeline:
+    """arith_steps의 단계 목록을 브라우저 재생용 이벤트로 바꾼다."""
+    tl = Timeline()
+    prev = (tuple(a_digits), tuple(b_digits), (0, 0, 0, 0))
+    tl.render_all(prev)
+    for stp in steps:
+        if stp.kind == "alert":
+            tl.alert(stp.text)
+        elif stp.kind == "move":
+            tl.render_all(stp.after); tl.sound("pop"); tl.wait(STEP_DELAY_MOVE)
+        elif stp.kind == "carry":
+            tl.flash_carry(stp.src, prev[2][0])
+            tl.render_all(stp.after, label=stp.dst.upper()); tl.wait(STEP_DELAY_MOVE)
+        elif stp.kind == "borrow":
+            tl.flash_borrow(stp.src, stp.dst)
+            tl.render_all(stp.after, label=stp.src.upper()); tl.wait(STEP_DELAY_MOVE)
+        elif stp.kind == "collect":
+            tl.render_all(stp.after)
+        elif stp.kind == "done":
+            tl.render_all(stp.after); tl.sound("ok")
+        prev = stp.after
+    return tl
+
+def add_timeline(a_digits, b_digits) -> Timeline:
+    return steps_timeline(a_digits, b_digits, add_steps(tuple(a_digits), tuple(b_digits)))
+
+def sub_timeline(a_digits, b_digits) -> Timeline:
+    return steps_timeline(a_digits, b_digits, sub_steps(tuple(a_digits), tuple(b_digits)))
+
+# ────────── HTML(컴포넌트) ──────────
+def _data_uri(data: bytes, mime: str) -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+def timeline_payload(tl: Timeline, sounds: Dict[str, str]) -> dict:
+    """한 번에 보낼 데이터: 쓰인 스프라이트만 data URI로 포함. sounds(이름→data URI)도 쓰인 것만."""
+    return {
+        "sprites": {sid: _data_uri(panel_png(*key), "image/png") for key, sid in tl.sprites.items()},
+        "sounds": {name: sounds[name] for name in tl.sounds if sounds.get(name)},
+        "events": tl.events,
+        "total_ms": tl.ms,
+    }
+
+def _row_html(row: str, title: str) -> str:
+    cells = []
+    for i, p in enumerate(PLACES):
+        slot = row + p.upper()
+        cells.append(f"<div class='num' id='d-{slot}'></div>")
+        if i == 0:
+            cells.append("<div class='num'>·</div>")
+    panels = []
+    for i, p in enumerate(PLACES):
+        panels.append(f"<img class='pan' id='p-{row}{p.upper()}'>")
+        if i == 0:
+            panels.append("<div></div>")
+    return (f"<div class='row'><div class='ttl'>{html.escape(title)}</div>"
+            f"<div class='grid'>{''.join(cells)}</div><div class='grid'>{''.join(panels)}</div></div>")
+
+TIMELINE_JS = """
+const D = JSON.parse(document.getElementById('tl').textContent);
+const audio = {};
+for (const [k, v] of Object.entries(D.sounds)) { audio[k] = new Audio(v); }
+function sound(id) {
+  // 세션에 이미 등록된 효과음(부모 문서의 #dbl-snd-*)이 있으면 그것을 쓴다
+  let a = null;
+  try { a = window.parent.document.getElementById('dbl-snd-' + id); } catch (e) {}
+  return a || audio[id];
+}
+const alertEl = document.getElementById('alert');
+function apply(ev) {
+  if (ev.op === 'panel') document.getElementById('p-' + ev.slot).src = D.sprites[ev.sprite];
+  else if (ev.op === 'digit') document.getElementById('d-' + ev.slot).textContent = ev.val;
+  else if (ev.op === 'alert') {
+    alertEl.innerHTML = ev.html || '';
+    alertEl.style.display = ev.html ? 'block' : 'none';
+  } else if (ev.op === 'sound' && sound(ev.id)) {
+    sound(ev.id).cloneNode().play().catch(() => {});
+  }
+}
+const t0 = performance.now();
+let i = 0;
+function tick() {
+  const now = performance.now() - t0;
+  while (i < D.events.length && D.events[i].at <= now) apply(D.events[i++]);
+  if (i < D.events.length) requestAnimationFrame(tick);
+}
+// 시작 시각(0ms) 이벤트는 즉시 반영해 빈 화면이 보이지 않게 한다
+tick();
+"""
+
+TIMELINE_CSS = """
+body{margin:0;font-family:'Noto Sans KR',sans-serif}
+.row{margin-bottom:10px}
+.ttl{text-align:center;font-size:20px;font-weight:900;margin-bottom:4px}
+.grid{display:grid;grid-template-columns:1fr 0.10fr 1fr 1fr 1fr;gap:8px;align-items:center}
+.num{text-align:center;font-size:44px;font-weight:1000;line-height:1}
+.pan{width:100%}
+.top{display:grid;grid-template-columns:1fr 1fr;gap:32px}
+#alert{display:none;max-width:1100px;margin:8px auto 14px auto;background:#ffffff;border:3px solid #0ea5a6;
+       border-radius:16px;padding:20px 24px;box-shadow:0 8px 28px rgba(0,0,0,0.15);
+       font-size:28px;font-weight:900;color:#0f172a;text-align:center}
+"""
+
+def timeline_html(tl: Timeline, sounds, titles=("첫번째 수", "두번째 수")) -> str:
+    payload = json.dumps(timeline_payload(tl, sounds)).replace("</", "<\\/")
+    return (
+        f"<style>{TIMELINE_CSS}</style><div id='alert'></div>"
+        f"<div class='top'>{_row_html('A', titles[0])}{_row_html('B', titles[1])}</div>"
+        f"{_row_html('R', '결과')}"
+        f"<script type='application/json' id='tl'>{payload}</script><script>{TIMELINE_JS}</script>"
+    )
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# Decimal Blocks 3D — 받아올림/받아내림 단계 엔진(UI 비의존)
+# - A, B의 자리 숫자(일, 0.1, 0.01, 0.001)를 받아 애니메이션 단계 목록을 순수 데이터로 계산
+# - 단계: move(블록 1개 이동), carry(10개 → 윗자리 1), borrow(윗자리 1 → 10개), alert(말풍선 문구), collect, done
+# - 각 단계에는 적용 후 상태(after)를 함께 담아 렌더러는 그대로 그리기만 하면 됨
+# - Milli: 천분의 일 단위 정수 값 타입(입력 파싱·정답 비교·표시)
+# - Streamlit/matplotlib import 없음 → 오프라인 전수 검증·배치 도구에서 재사용
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+Digits = Tuple[int, int, int, int]            # (o, t, h, k)
+State  = Tuple[Digits, Digits, Digits]        # (A, B, R)
+
+PLACES = ("o", "t", "h", "k")
+ROWS   = ("A", "B", "R")
+
+class Step(NamedTuple):
+    kind: str                   # "move" | "carry" | "borrow" | "alert" | "collect" | "done"
+    after: State                # 단계 적용 후 (A, B, R) 자리별 개수
+    src: Optional[str] = None   # move: 출발 줄("A"/"B"/"R"), carry/borrow: 출발 자리
+    dst: Optional[str] = None   # move: 도착 줄, carry/borrow: 도착 자리
+    place: Optional[str] = None # move: 이동한 자리
+    text: Optional[str] = None  # alert: 말풍선 문구(HTML)
+
+# ────────── 천분의 일 단위 정수 ──────────
+class Milli:
+    """소수 셋째 자리까지의 수를 천분의 일 단위 정수로 보관(1.257 → 1257). 부동소수 오차 없음."""
+    __slots__ = ("v",)
+
+    def __init__(self, v: int):
+        self.v = int(v)
+
+    @classmethod
+    def from_float(cls, x: float) -> "Milli":
+        """number_input 값(float)처럼 이미 셋째 자리로 맞춰진 수."""
+        return cls(round(float(x) * 1000))
+
+    @classmethod
+    def parse(cls, text: str) -> "Milli":
+        """학생 입력 문자열을 바로 천분의 일 단위로(넷째 자리부터는 반올림). 숫자가 아니면 ValueError."""
+        try:
+            d = Decimal(str(text).strip())
+        except InvalidOperation:
+            raise ValueError(f"not a number: {text!r}")
+        if not d.is_finite():
+            raise ValueError(f"not a number: {text!r}")
+        return cls(int((d * 1000).quantize(Decimal(1), rounding=ROUND_HALF_UP)))
+
+    def digits(self) -> Digits:
+        """(일, 0.1, 0.01, 0.001) 자리 숫자."""
+        v = abs(self.v)
+        return v // 1000 % 10, v // 100 % 10, v // 10 % 10, v % 10
+
+    def __add__(self, other: "Milli") -> "Milli":
+        return Milli(self.v + other.v)
+
+    def __sub__(self, other: "Milli") -> "Milli":
+        return Milli(self.v - other.v)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Milli) and self.v == other.v
+
+    def __hash__(self) -> int:
+        return hash(self.v)
+
+    def __str__(self) -> str:
+        sign = "-" if self.v < 0 else ""
+        q, r = divmod(abs(self.v), 1000)
+        return f"{sign}{q}.{r:03d}"
+
+    def __repr__(self) -> str:
+        return f"Milli({self.v})"
+
+# ────────── 문구 ──────────
+CARRY_TEXT = {
+    "k": "0.001이 10개 모여 0.01이 됐어요.<br><b>소수 둘째 자리로 1 받아올림할게요.</b>",
+    "h": "0.01이 10개 모여 0.1이 됐어요.<br><b>소수 첫째 자리로 1 받아올림할게요.</b>",
+    "t": "0.1이 10개 모여 1이 됐어요.<br><b>일의 자리로 1 받아올림할게요.</b>",
+}
+BORROW_TEXT = {
+    "k": "0.01 하나를 0.001 10개로 받아내림할게요.",
+    "h": "0.1 하나를 0.01 10개로 받아내림할게요.",
+    "t": "1 하나를 0.1 10개로 받아내림할게요.",
+}
+PREBORROW_TEXT = {
+    "h": "0.1 하나를 0.01 10개로 바꿔 먼저 내려올게요.",
+    "t": "1 하나를 0.1 10개로 바꿔 먼저 내려올게요.",
+}
+NEXT_PLACE = {"k": "h", "h": "t", "t": "o"}
+HIGHER = {"k": ("h", "t", "o"), "h": ("t", "o"), "t": ("o",)}
+
+class _Board:
+    def __init__(self, a: Digits, b: Digits):
+        self.rows = {"A": dict(zip(PLACES, a)), "B": dict(zip(PLACES, b)), "R": dict.fromkeys(PLACES, 0)}
+        self.steps = []
+
+    def state(self) -> State:
+        return tuple(tuple(self.rows[r][p] for p in PLACES) for r in ROWS)
+
+    def emit(self, kind, **kw):
+        self.steps.append(Step(kind, self.state(), **kw))
+
+# ────────── 덧셈 ──────────
+@lru_cache(maxsize=4096)
+def add_steps(a: Digits, b: Digits) -> Tuple[Step, ...]:
+    """A+B: 낮은 자리부터 A, B 순서로 하나씩 결과판으로 옮기고, 10개가 되면 받아올림."""
+    bd = _Board(a, b); R = bd.rows["R"]
+    for p in ("k", "h", "t", "o"):
+        for row in ("A", "B"):
+            for _ in range(bd.rows[row][p]):
+                bd.rows[row][p] -= 1; R[p] += 1
+                bd.emit("move", src=row, dst="R", place=p)
+                if p != "o" and R[p] == 10:
+                    bd.emit("alert", text=CARRY_TEXT[p])
+                    nxt = NEXT_PLACE[p]
+                    R[p] = 0; R[nxt] += 1
+                    bd.emit("carry", src=p, dst=nxt)
+    bd.emit("done")
+    return tuple(bd.steps)
+
+# ────────── 뺄셈 ──────────
+def _borrow(bd: _Board, p: str, need: int):
+    R = bd.rows["R"]
+    if R[p] >= need: return
+    bd.emit("alert", text=f"{R[p]}에서 {need}을 뺄 수 없어요!<br><b>{BORROW_TEXT[p]}</b>")
+    direct = HIGHER[p][0]
+    if R[direct] > 0:
+        R[direct] -= 1; R[p] += 10
+        bd.emit("borrow", src=direct, dst=p); return
+    # 바로 윗자리가 비었으면 더 윗자리에서 먼저 내려온다
+    for src, dst in zip(HIGHER[p][1:], HIGHER[p][:-1]):
+        if R[src] > 0:
+            bd.emit("alert", text=PREBORROW_TEXT[dst])
+            R[src] -= 1; R[dst] += 10
+            bd.emit("borrow", src=src, dst=dst)
+            _borrow(bd, p, need); return
+
+@lru_cache(maxsize=4096)
+def sub_steps(a: Digits, b: Digits) -> Tuple[Step, ...]:
+    """A−B: A를 결과판으로 한 번에 옮긴 뒤, 낮은 자리부터 B만큼 덜어낸다(모자라면 받아내림)."""
+    bd = _Board(a, b); A, B, R = bd.rows["A"], bd.rows["B"], bd.rows["R"]
+    for p in PLACES:
+        R[p] += A[p]; A[p] = 0
+    bd.emit("collect")
+    for p in ("k", "h", "t", "o"):
+        need = B[p]
+        if need <= 0: continue
+        if p != "o" and R[p] < need: _borrow(bd, p, need)
+        for _ in range(need):
+            R[p] -= 1; B[p] -= 1
+            bd.emit("move", src="B", dst=None, place=p)
+    bd.emit("done")
+    return tuple(bd.steps)
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+# 교실 부하 테스트 — 가상 학생 N명이 한 프로세스(=앱 인스턴스 1개)에서 동시에 앱을 사용
+# - Streamlit AppTest로 세션마다 스크립트를 실행(서버·브라우저 없음). 학생마다 프로세스 하나, DB 파일은 공용
+# - 학생 1명의 한 바퀴: 첫 화면 → 문제 수 입력 → 정답 확인(덧셈) → 덧셈 애니메이션 → 정답 확인(뺄셈)
+#   → 뺄셈 애니메이션 → 닉네임·답변 입력 후 제출
+# - A, B는 순서 없이 뽑음 → 절반쯤은 A<B 뺄셈(결과판 음수)도 함께 실행
+# - 임시 데이터 폴더(BLOCKS_DATA_DIR)의 submissions.db 사용 → 실제 DB는 건드리지 않음
+# - 보고: 단계별 지연 p50/p95/최대, 세션당 CPU·필요 코어 수, 연결 풀 대기(DB 잠금 대기), 저장된 제출 수
+#
+#   python benchmarks/classroom_load.py --students 25 --rounds 2
+#   python benchmarks/classroom_load.py --students 10 --server-anim      # 서버에서 단계별로 애니메이션(느림)
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP  = ROOT / "streamlit_app.py"
+CLASSES = ["4-사랑", "4-기쁨", "4-보람", "4-행복", "기타"]
+ANSWERS = ["막대가 10개 모이면 판이 돼요", "작은 큐브 열 개를 막대로 바꿨어요",
+           "받아올림이 두 번 일어났어요", "판을 막대 10개로 바꿔서 뺐어요", "애니메이션이 재밌어요"]
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def share_script_cache():
+    """AppTest는 run()마다 새 ScriptCache를 만들어 앱 스크립트를 매번 다시 컴파일한다.
+    실제 서버처럼 한 번 컴파일한 코드를 계속 쓰게 바꾼다(컴파일 시간이 측정에 섞이지 않도록)."""
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test
+    shared = ScriptCache()
+    app_test.ScriptCache = lambda: shared
+
+class Student:
+    """가상 학생 1명(AppTest 세션 1개)."""
+
+    def __init__(self, idx: int, client_anim: bool, timeout: float, seed: int):
+        from streamlit.testing.v1 import AppTest
+        self.idx = idx
+        self.rng = random.Random(seed + idx)
+        self.at = AppTest.from_file(str(APP), default_timeout=timeout)
+        self.client_anim = client_anim
+        self.timings = defaultdict(list)
+        self.errors = []
+
+    def step(self, name: str, action):
+        t0 = time.perf_counter()
+        try:
+            action()
+            if self.at.exception:
+                self.errors.append(f"{name}: {self.at.exception[0].value}")
+        except Exception as e:
+            self.errors.append(f"{name}: {type(e).__name__}: {e}")
+        self.timings[name].append(time.perf_counter() - t0)
+
+    def round(self):
+        at, rng = self.at, self.rng
+        a, b = round(rng.uniform(0, 9.999), 3), round(rng.uniform(0, 9.999), 3)
+        guess_add = f"{a + b + rng.choice((0, 0, 0.01)):.3f}"
+        guess_sub = f"{a - b + rng.choice((0, 0, 0.1)):.3f}"
+
+        def first():
+            at.run()
+            at.toggle(key="client_anim").set_value(self.client_anim)
+            at.number_input(key="A").set_value(a)
+            at.number_input(key="B").set_value(b)
+            at.run()
+        self.step("load", first)
+        self.step("check_add", lambda: (at.text_input(key="guess_add").set_value(guess_add),
+                                        at.button(key="check_add").click().run()))
+        self.step("run_add", lambda: at.button(key="run_add").click().run())
+        self.step("check_sub", lambda: (at.text_input(key="guess_sub").set_value(guess_sub),
+                                        at.button(key="check_sub").click().run()))
+        self.step("run_sub", lambda: at.button(key="run_sub").click().run())
+
+        def submit():
+            [t for t in at.text_input if "닉네임" in t.label][0].set_value(f"load-{self.idx:03d}")
+            [w for w in at.selectbox if w.label == "학급"][0].set_value(rng.choice(CLASSES))
+            at.text_area[0].set_value(rng.choice(ANSWERS))
+            [w for w in at.button if w.label == "제출하기"][0].click().run()
+            if not at.success:
+                self.errors.append("submit: " + "; ".join(str(m.value) for m in list(at.error) + list(at.info)))
+        self.step("submit", submit)
+
+def student_proc(idx: int, rounds: int, client_anim: bool, ramp: float, timeout: float, seed: int,
+                 gate, results):
+    """학생 1명 = 프로세스 1개. 첫 접속까지 마친 뒤 모두 함께 출발, 끝나면 측정값을 results 큐로."""
+    import storage
+    import streamlit.logger
+    streamlit.logger.set_log_level("error")   # 세션마다 반복되는 사용 중단 안내 숨김
+    share_script_cache()
+    s = Student(idx, client_anim, timeout, seed)
+    s.step("connect", s.at.run)
+    gate.wait()
+    cpu0 = time.process_time()
+    time.sleep(s.rng.uniform(0, ramp))   # 수업 시작 직후 몇 초에 걸쳐 들어오는 모습
+    for _ in range(rounds):
+        s.round()
+    storage.get_writer().close()   # 남은 제출까지 커밋
+    results.put({"idx": idx, "timings": dict(s.timings), "errors": s.errors,
+                 "cpu_s": time.process_time() - cpu0, "db_pool": storage.get_db().stats()})
+
+def run(students: int, rounds: int, client_anim: bool, ramp: float, timeout: float, seed: int) -> dict:
+    # AppTest는 run() 동안 Streamlit 런타임 전역 상태를 바꿔 끼우므로 한 프로세스에서 여러 세션을 동시에 돌릴 수 없다.
+    # → 학생마다 프로세스 하나. 스프라이트는 부모에서 한 번 그린 뒤 fork로 물려줘서
+    #   "스프라이트가 이미 준비된 서버 한 대"에 가깝게 맞춘다. DB는 모든 프로세스가 같은 파일을 쓴다.
+    import blocks3d
+    blocks3d.warm_sprite_cache()
+    # 부모는 fork 전에 DB 연결 풀을 만들지 않는다(열린 SQLite 연결을 자식에게 물려주면 안 됨)
+    import storage
+    before_id = 0
+    if Path(storage.DB_PATH).exists():
+        with closing(sqlite3.connect(storage.DB_PATH)) as conn:
+            try:
+                before_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM submissions").fetchone()[0]
+            except sqlite3.OperationalError:
+                pass   # 아직 표가 없음
+
+    ctx = mp.get_context("fork")
+    gate, results = ctx.Barrier(students + 1), ctx.Queue()
+    procs = [ctx.Process(target=student_proc, name=f"student-{i}", daemon=True,
+                         args=(i, rounds, client_anim, ramp, timeout, seed, gate, results))
+             for i in range(students)]
+    for p in procs:
+        p.start()
+    gate.wait()
+    wall0 = time.perf_counter()
+    done = [results.get() for _ in procs]
+    wall = time.perf_counter() - wall0
+    for p in procs:
+        p.join()
+
+    steps, pool, errors = defaultdict(list), defaultdict(float), []
+    for r in sorted(done, key=lambda r: r["idx"]):
+        for name, ts in r["timings"].items():
+            steps[name].extend(ts)
+        for k, v in r["db_pool"].items():
+            pool[k] += v
+        errors += [f"student-{r['idx']} {e}" for e in r["errors"]]
+    cpu = sum(r["cpu_s"] for r in done)
+    with storage.get_db().reader() as conn:
+        saved = conn.execute("SELECT COUNT(*) FROM submissions WHERE id > ? AND nickname LIKE 'load-%'",
+                             (before_id,)).fetchone()[0]
+    return {
+        "students": students, "rounds": rounds, "client_anim": client_anim,
+        "wall_s": round(wall, 2),
+        "cpu_s": round(cpu, 2),
+        "cpu_s_per_session": round(cpu / students, 3),
+        "cores_busy": round(cpu / wall, 2),   # 같은 부하를 버티는 데 필요한 CPU 코어 수(대략)
+        "steps": {name: {"n": len(ts),
+                         "p50_ms": round(statistics.median(ts) * 1000, 1),
+                         "p95_ms": round(percentile(ts, 0.95) * 1000, 1),
+                         "max_ms": round(max(ts) * 1000, 1)}
+                  for name, ts in steps.items()},
+        "db_pool": {k: round(v, 4) if k.endswith("_s") else int(v) for k, v in pool.items()},
+        "submissions_expected": students * rounds,
+        "submissions_saved": saved,
+        "errors": errors[:50],
+        "error_count": len(errors),
+    }
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="가상 학생 N명 동시 사용 부하 테스트(AppTest)")
+    ap.add_argument("--students", type=int, default=25, help="동시 학생 수(기본 25)")
+    ap.add_argument("--rounds", type=int, default=1, help="학생마다 반복할 바퀴 수(기본 1)")
+    ap.add_argument("--server-anim", action="store_true",
+                    help="애니메이션을 서버에서 단계별로 재생(기본은 브라우저 재생)")
+    ap.add_argument("--ramp", type=float, default=5.0, help="접속을 퍼뜨릴 시간(초, 기본 5)")
+    ap.add_argument("--timeout", type=float, default=600.0, help="스크립트 실행 1회 제한 시간(초)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--data-dir", type=Path, help="데이터 폴더(기본: 임시 폴더)")
+    ap.add_argument("--out", type=Path, help="결과 JSON 경로(기본 benchmarks/results/load-<시각>.json)")
+    args = ap.parse_args(argv)
+
+    # storage를 import하기 전에 데이터 폴더를 정해야 함
+    data_dir = args.data_dir or Path(tempfile.mkdtemp(prefix="blocks-load-"))
+    os.environ["BLOCKS_DATA_DIR"] = str(data_dir)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+    os.chdir(tempfile.mkdtemp(prefix="blocks-cwd-"))   # 앱이 만드는 ./.data 등이 저장소에 생기지 않도록
+    sys.path.insert(0, str(ROOT))
+
+    report = run(args.students, args.rounds, not args.server_anim, args.ramp, args.timeout, args.seed)
+    report["data_dir"] = str(data_dir)
+    report["created"] = datetime.now().isoformat(timespec="seconds")
+
+    print(f"학생 {report['students']}명 × {report['rounds']}바퀴, "
+          f"{'브라우저' if report['client_anim'] else '서버'} 애니메이션, 전체 {report['wall_s']} s")
+    for name, st in report["steps"].items():
+        print(f"  {name:<10} p50 {st['p50_ms']:>8.1f} ms   p95 {st['p95_ms']:>8.1f} ms   max {st['max_ms']:>8.1f} ms")
+    pool = report["db_pool"]
+    print(f"  CPU {report['cpu_s']} s (세션당 {report['cpu_s_per_session']} s, 평균 {report['cores_busy']}코어 사용)")
+    print(f"  DB 대기: 쓰기 {pool.get('writer_waits', 0)}회 {pool.get('writer_wait_s', 0):.3f} s, "
+          f"읽기 {pool.get('reader_waits', 0)}회 {pool.get('reader_wait_s', 0):.3f} s")
+    print(f"  제출 저장 {report['submissions_saved']}/{report['submissions_expected']}, 오류 {report['error_count']}건")
+    for e in report["errors"][:5]:
+        print("   -", e)
+
+    out = args.out or ROOT / "benchmarks" / "results" / f"load-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"\n저장: {out}")
+    return 0 if report["error_count"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# 교사 대시보드 내보내기 점검 — 다운로드 버튼의 지연 생성 콜러블을 실제로 실행
+# - 임시 데이터 폴더(BLOCKS_DATA_DIR)에 제출 N건을 넣고 대시보드를 AppTest로 실행(형식마다 한 번)
+# - download_button이 등록한 콜러블을 가로채 실행 → 디스크 파일 객체(BufferedReader)를 돌려주는지 확인,
+#   만드는 동안 파이썬 메모리 최대치(tracemalloc)도 출력 — 청크(CHUNK_ROWS행) 하나 크기에서 멈춰야 함
+# - Streamlit이 클릭 때 쓰는 변환(convert_data_to_bytes_and_infer_mime)을 그대로 거친 bytes를
+#   pyarrow/csv로 다시 읽어 행 수 확인
+# - 실패하면 종료 코드 1
+#
+#   python benchmarks/export_check.py
+#   python benchmarks/export_check.py --rows 80000
+
+import argparse
+import csv
+import io
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGE = ROOT / "pages" / "1_teacher_dashboard.py"
+CLASSES = ["4-사랑", "4-기쁨", "4-보람", "4-행복", "기타"]
+
+def seed(rows: int):
+    """최근 14일(대시보드 기본 기간) 안에 고르게 퍼진 제출 rows건(쓰기 스레드 경유, 끝까지 커밋)."""
+    import storage
+    rng, now = random.Random(0), datetime.now(ZoneInfo("Asia/Seoul"))
+    for i in range(rows):
+        ts = now - timedelta(seconds=rng.randrange(14 * 86400))
+        r = [rng.randint(0, 2) for _ in range(3)]
+        storage.add_submission({
+            "timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"), "ts_epoch": int(ts.timestamp()),
+            "class": rng.choice(CLASSES), "nickname": f"check-{i:05d}",
+            "quest": "막대가 10개 모이면 판이 돼요, \"받아올림\"", "rubric_1": r[0], "rubric_2": r[1],
+            "rubric_3": r[2], "rubric_total": sum(r), "guess_mode": "add", "guess_value": "1.234",
+            "guess_correct": rng.randint(0, 1), "correct_answer": "1.234",
+        })
+    storage.get_writer().close()
+
+def capture_deferred() -> list:
+    """download_button(data=콜러블)이 미디어 파일 관리자에 등록하는 콜러블을 목록에 모음."""
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    seen, orig = [], MediaFileManager.add_deferred
+    def add_deferred(self, data_callable, mimetype, coordinates, file_name=None):
+        seen.append((data_callable, mimetype, file_name))
+        return orig(self, data_callable, mimetype, coordinates, file_name=file_name)
+    MediaFileManager.add_deferred = add_deferred
+    return seen
+
+def count_rows(fmt: str, data: bytes) -> int:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+    if fmt == "parquet":
+        return pq.read_table(pa.BufferReader(data)).num_rows
+    if fmt == "arrow":
+        return ipc.open_file(pa.BufferReader(data)).read_all().num_rows
+    return sum(1 for _ in csv.reader(io.StringIO(data.decode("utf-8-sig")))) - 1   # 머리글 제외
+
+def check(fmt: str, expected: int, seen: list, timeout: float) -> list:
+    from streamlit.elements.widgets.button import convert_data_to_bytes_and_infer_mime
+    from streamlit.testing.v1 import AppTest
+    errors = []
+    at = AppTest.from_file(str(PAGE), default_timeout=timeout)
+    at.session_state["teacher_ok"] = True
+    at.run()
+    seen.clear()
+    at.selectbox(key="export_fmt").set_value(fmt).run()
+    if at.exception:
+        return [f"{fmt}: 대시보드 예외 {at.exception[0].value}"]
+    if not seen:
+        return [f"{fmt}: 지연 생성 다운로드 버튼이 없음"]
+    fn, mime, file_name = seen[-1]
+    t0 = time.perf_counter()
+    tracemalloc.start()
+    try:
+        out = fn()
+    except Exception as e:
+        return [f"{fmt}: 콜러블 실행 실패 {type(e).__name__}: {e}"]
+    finally:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    ms = (time.perf_counter() - t0) * 1000
+    if not isinstance(out, io.BufferedReader):
+        errors.append(f"{fmt}: 콜러블이 디스크 파일이 아닌 {type(out).__name__}을(를) 돌려줌")
+    try:
+        data, _ = convert_data_to_bytes_and_infer_mime(out, unsupported_error=TypeError("지원하지 않는 반환 형식"))
+    except Exception as e:
+        return errors + [f"{fmt}: Streamlit 변환 실패 {type(e).__name__}: {e}"]
+    finally:
+        if hasattr(out, "close"):
+            out.close()
+    n = count_rows(fmt, data)
+    print(f"  {fmt:<8} {file_name:<30} {mime:<36} {len(data) / 1024:>9.1f} KiB  {n}행  {ms:.0f} ms  "
+          f"생성 중 최대 {peak / 1024:.0f} KiB")
+    if n != expected:
+        errors.append(f"{fmt}: 행 수 {n} ≠ {expected}")
+    return errors
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="교사 대시보드 내보내기 다운로드 점검(AppTest)")
+    ap.add_argument("--rows", type=int, default=2000, help="넣어 둘 제출 수(기본 2000)")
+    ap.add_argument("--timeout", type=float, default=300.0, help="스크립트 실행 1회 제한 시간(초)")
+    args = ap.parse_args(argv)
+
+    # storage를 import하기 전에 데이터 폴더를 정해야 함
+    os.environ["BLOCKS_DATA_DIR"] = tempfile.mkdtemp(prefix="blocks-export-")
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
+    os.chdir(tempfile.mkdtemp(prefix="blocks-cwd-"))
+    sys.path.insert(0, str(ROOT))
+    import streamlit.logger
+    streamlit.logger.set_log_level("error")
+
+    from export import FORMATS
+    seed(args.rows)
+    seen = capture_deferred()
+    print(f"제출 {args.rows}건, 데이터 폴더 {os.environ['BLOCKS_DATA_DIR']}")
+    errors = []
+    for fmt in FORMATS:
+        errors += check(fmt, args.rows, seen, args.timeout)
+    for e in errors:
+        print("   -", e)
+    print("통과" if not errors else f"실패 {len(errors)}건")
+    return 0 if not errors else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# 3D 블록 그리기 벤치마크 (헤드리스, Streamlit 서버 없음)
+# - 단계별 지연: scene_axes / draw_cubes·plates·rods·micros / 패널 래스터화 / 12패널 한 화면
+# - 개수별(0~MAX_COUNT 대표값) 반복 측정 → 평균·중앙값·p95·최소(ms) + 단계별 최대 메모리(tracemalloc)
+# - 결과는 JSON(커밋 해시 포함)으로 저장, --compare 로 이전 결과와 단계별 비율 비교
+#
+#   python benchmarks/render_bench.py                      # benchmarks/results/render-<커밋>.json
+#   python benchmarks/render_bench.py --quick --compare benchmarks/results/render-abc1234.json
+
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import matplotlib  # noqa: E402
+
+import blocks3d  # noqa: E402  (pyplot 없이 Figure + Agg 캔버스)
+
+COUNTS = (0, 1, 5, 9, blocks3d.MAX_COUNT)
+KINDS  = ("O", "T", "H", "K")
+DRAW_NAMES = {k: fn.__name__ for k, fn in blocks3d.DRAWERS.items()}
+
+# 한 화면(덧셈 탭) = 첫째 수·둘째 수·결과 각 4패널. 대표 상태: 받아올림 직전(결과 쪽이 가장 많이 찬 상태 포함)
+FRAMES = {
+    "add_start":  ((3, 4, 5, 6), (2, 7, 8, 9), (0, 0, 0, 0)),
+    "add_carry":  ((0, 0, 0, 0), (0, 0, 0, 0), (5, 11, 13, 15)),
+    "add_full":   ((9, 9, 9, 9), (9, 9, 9, 9), (19, 19, 19, 19)),
+}
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+def measure(fn, repeat: int, setup=None, teardown=None) -> dict:
+    """fn을 repeat번 실행한 지연(ms) 통계 + 별도 1회 실행의 최대 메모리(KiB, tracemalloc은 느려서 시간 측정과 분리).
+    setup 반환값을 fn 인자로 넘기고, setup/teardown은 시간 밖에서."""
+    def once(trace: bool):
+        arg = setup() if setup else None
+        if trace:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        out = fn(arg) if setup else fn()
+        dt = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] if trace else 0
+        if trace:
+            tracemalloc.stop()
+        if teardown:
+            teardown(arg if setup else out)
+        return dt * 1000, peak
+
+    times = sorted(once(False)[0] for _ in range(repeat))
+    peak = once(True)[1]
+    return {
+        "n": repeat,
+        "mean_ms":   round(statistics.fmean(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "p95_ms":    round(times[min(len(times) - 1, int(0.95 * len(times)))], 3),
+        "min_ms":    round(times[0], 3),
+        "peak_kib":  round(peak / 1024, 1),
+    }
+
+def bench_scene_axes(repeat: int):
+    yield {"stage": "scene_axes"}, measure(blocks3d.scene_axes, repeat)
+
+def bench_draw(repeat: int):
+    # 빈 장면은 시간 밖에서 만들고, 블록 추가만 측정
+    for kind in KINDS:
+        for n in COUNTS:
+            stats = measure(lambda fa: blocks3d.DRAWERS[kind](fa[1], n, blocks3d.KIND_COLORS[kind]),
+                            repeat, setup=blocks3d.scene_axes)
+            yield {"stage": DRAW_NAMES[kind], "kind": kind, "count": n}, stats
+
+def bench_panel(repeat: int):
+    # 캐시를 거치지 않은 패널 1장: (풀에서 빌린) 장면 + 블록 + PNG 저장
+    for kind in KINDS:
+        for n in COUNTS:
+            yield ({"stage": "render_panel", "kind": kind, "count": n},
+                   measure(lambda: blocks3d.rasterize_panel(kind, n), repeat))
+
+def frame_panels(frame):
+    for row in frame:
+        for kind, n in zip(KINDS, row):
+            yield kind, n
+
+def bench_frame(repeat: int):
+    for name, frame in FRAMES.items():
+        def uncached():
+            for kind, n in frame_panels(frame):
+                blocks3d.rasterize_panel(kind, n)
+        def cached():
+            for kind, n in frame_panels(frame):
+                blocks3d.panel_png(kind, n)
+        yield {"stage": "render_all_add", "frame": name, "cache": False}, measure(uncached, max(1, repeat // 4))
+        for kind, n in frame_panels(frame):   # 스프라이트 캐시 채운 뒤 측정(앱의 실제 경로)
+            blocks3d.panel_png(kind, n)
+        yield {"stage": "render_all_add", "frame": name, "cache": True}, measure(cached, repeat)
+
+def bench_warm(_repeat: int):
+    blocks3d._SPRITES.clear()
+    stats = measure(blocks3d.warm_sprite_cache, 1)
+    yield {"stage": "warm_sprite_cache", "sprites": blocks3d.sprite_cache_size()}, stats
+
+SUITES = {
+    "scene_axes": bench_scene_axes,
+    "draw":       bench_draw,
+    "panel":      bench_panel,
+    "frame":      bench_frame,
+    "warm":       bench_warm,
+}
+
+def case_id(case: dict) -> str:
+    return "/".join(f"{k}={v}" for k, v in case.items())
+
+def compare(results: list, baseline_path: Path):
+    base = {case_id(r["case"]): r for r in json.loads(baseline_path.read_text())["results"]}
+    print(f"\n── 비교: {baseline_path.name} (중앙값, 새/이전) ──")
+    for r in results:
+        old = base.get(case_id(r["case"]))
+        if not old or not old["median_ms"]:
+            continue
+        ratio = r["median_ms"] / old["median_ms"]
+        flag = "  ▲ 느려짐" if ratio > 1.10 else ("  ▼ 빨라짐" if ratio < 0.90 else "")
+        print(f"{case_id(r['case']):<48} {old['median_ms']:>9.2f} → {r['median_ms']:>9.2f} ms  ×{ratio:.2f}{flag}")
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="3D 블록 그리기 벤치마크(헤드리스)")
+    ap.add_argument("--repeat", type=int, default=20, help="경우마다 반복 횟수(기본 20)")
+    ap.add_argument("--quick", action="store_true", help="반복 5회, 전체 스프라이트 예열 생략")
+    ap.add_argument("--only", choices=list(SUITES), nargs="+", help="일부 단계만")
+    ap.add_argument("--out", type=Path, help="결과 JSON 경로(기본 benchmarks/results/render-<커밋>.json)")
+    ap.add_argument("--compare", type=Path, help="이전 결과 JSON과 단계별 비교")
+    args = ap.parse_args(argv)
+
+    repeat = 5 if args.quick else args.repeat
+    suites = args.only or [s for s in SUITES if not (args.quick and s == "warm")]
+    commit = git_commit()
+
+    results = []
+    for suite in suites:
+        for case, stats in SUITES[suite](repeat):
+            results.append({"case": case, **stats})
+            print(f"{case_id(case):<48} median {stats['median_ms']:>9.2f} ms  "
+                  f"p95 {stats['p95_ms']:>9.2f} ms  peak {stats['peak_kib']:>9.1f} KiB")
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "matplotlib": matplotlib.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        "results": results,
+    }
+    out = args.out or ROOT / "benchmarks" / "results" / f"render-{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"\n저장: {out}")
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
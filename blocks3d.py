@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# Decimal Blocks 3D — 블록 그리기 + 스프라이트(PNG) 캐시
+# - 3D 블록(작은 큐브=0.001, 막대=0.01, 판=0.1, 큐브=1) 그리기 유틸
+# - 한 패널의 블록 N개는 NumPy로 면 배열을 한 번에 만들어 Poly3DCollection 하나로 추가
+# - 패널 이미지(PNG bytes)를 (kind, count, color, label) 키로 프로세스당 1회만 래스터화
+# - 래스터화는 pyplot 없이 Figure + Agg 캔버스로, 장면은 풀에 두고 재사용(블록·라벨만 교체)
+# - 계측(metrics): 장면 만들기 / 블록 그리기 / PNG 래스터화 구간, 스프라이트 수 게이지
+# - Streamlit 비의존: 벤치마크/배치 도구에서도 그대로 import 가능
+
+import io
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+from metrics import gauge_source, timed
+
+# ────────── 글꼴/스타일 ──────────
+matplotlib.rcParams["font.family"] = [
+    "Noto Sans CJK KR", "NanumGothic", "Apple SD Gothic Neo",
+    "Malgun Gothic", "DejaVu Sans"
+]
+matplotlib.rcParams["font.size"] = 13
+
+# ────────── 색 ──────────
+COLOR_ONES   = (0.20, 0.48, 0.78, 1.0)   # 1 (큐브)
+COLOR_TENTHS = (0.46, 0.68, 0.22, 1.0)   # 0.1 (판)
+COLOR_HUNDS  = (0.98, 0.52, 0.18, 1.0)   # 0.01 (막대)
+COLOR_THOUS  = (0.60, 0.40, 0.80, 1.0)   # 0.001 (작은 큐브)
+COLOR_FLASH  = (1.00, 1.00, 0.10, 1.0)   # 형광노랑
+
+KIND_COLORS = {"O": COLOR_ONES, "T": COLOR_TENTHS, "H": COLOR_HUNDS, "K": COLOR_THOUS}
+
+# 결과판 받아올림/받아내림 라벨
+LABELS = {"O": "0.1×10→1", "T": "0.01×10→0.1", "H": "0.001×10→0.01"}
+
+# ────────── 지오메트리(패널의 블록 전부를 한 번에) ──────────
+# 단위 직육면체 꼭짓점 8개와 면 6개(꼭짓점 번호 4개씩)
+UNIT_CORNERS = np.array([[0,0,0],[1,0,0],[1,1,0],[0,1,0],[0,0,1],[1,0,1],[1,1,1],[0,1,1]], dtype=float)
+CUBOID_FACES = np.array([[0,1,2,3],[4,5,6,7],[0,1,5,4],[2,3,7,6],[1,2,6,5],[0,3,7,4]])
+UNIT_FACES   = UNIT_CORNERS[CUBOID_FACES]          # (6, 4, 3)
+EDGE_COLOR   = (0, 0, 0, 0.35)
+
+def cuboid_faces(origins, size) -> np.ndarray:
+    """같은 크기 블록 N개의 면 다각형 (N*6, 4, 3). origins: (N, 3) 각 블록의 (x, y, z) 최소 모서리."""
+    origins = np.asarray(origins, dtype=float).reshape(-1, 1, 1, 3)
+    return (origins + UNIT_FACES * np.asarray(size, dtype=float)).reshape(-1, 4, 3)
+
+def add_blocks(ax, origins, size, color):
+    """블록 N개를 Poly3DCollection 하나로 추가(블록마다 아티스트를 만들지 않음)."""
+    faces = cuboid_faces(origins, size)
+    if len(faces):
+        ax.add_collection3d(Poly3DCollection(faces, facecolors=color, edgecolors=EDGE_COLOR))
+
+def scene_axes():
+    # pyplot을 거치지 않는 Figure + Agg 캔버스(전역 상태 없음 → 스레드마다 따로 그려도 됨)
+    fig = Figure(figsize=(2.6, 2.6), dpi=160)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    ax.set_facecolor((1,1,1,0)); ax.grid(False)
+    try: ax.set_proj_type('ortho')
+    except: pass
+    try: ax.set_box_aspect((5,3,3))
+    except: pass
+    ax.view_init(elev=18, azim=-45)
+    ax.set_xlim(0,5.2); ax.set_ylim(0,3.2); ax.set_zlim(0,3.2)
+    ax.set_xticks([]); ax.set_yticks([]); ax.set_zticks([])
+    try: ax.set_position([0,0,1,1])
+    except: pass
+    return fig, ax
+
+# ────────── 크기/간격 ──────────
+GAP_MICRO_X = 0.10
+GAP_ROD_X   = 0.10
+GAP_PLATE_Z = 0.10
+
+S = 1.0 + 9*GAP_ROD_X
+PLATE_THICK = max((S - 9*GAP_PLATE_Z)/10.0, 0.001)
+
+SIZE_MICRO = (0.1, 0.1, 0.1)      # 0.001
+SIZE_ROD   = (0.1, S, 0.1)        # 0.01
+SIZE_PLATE = (S, S, PLATE_THICK)  # 0.1
+SIZE_CUBE  = (S, S, S)            # 1
+
+def _row_x(n, step):
+    """x축으로 step 간격인 블록 n개의 원점 (n, 3). 음수 개수(A<B 뺄셈의 결과판)는 빈 패널."""
+    n = max(int(n), 0)
+    o = np.zeros((n, 3))
+    o[:, 0] = np.arange(n) * step
+    return o
+
+def draw_micros(ax, n, color, gap_x=GAP_MICRO_X):
+    add_blocks(ax, _row_x(n, SIZE_MICRO[0] + gap_x), SIZE_MICRO, color)
+
+def draw_rods(ax, n, color, gap_x=GAP_ROD_X):
+    add_blocks(ax, _row_x(n, SIZE_ROD[0] + gap_x), SIZE_ROD, color)
+
+def draw_plates(ax, n, color, gap_z=GAP_PLATE_Z):
+    n = max(int(n), 0)
+    o = np.zeros((n, 3))
+    o[:, 2] = np.arange(n) * (PLATE_THICK + gap_z)
+    add_blocks(ax, o, SIZE_PLATE, color)
+
+def draw_cubes(ax, n, color, cols=2, gap=None):
+    if gap is None: gap = 0.35 * S
+    n = max(int(n), 0)
+    r, c = np.divmod(np.arange(n), cols)
+    o = np.zeros((n, 3))
+    o[:, 0] = c * (SIZE_CUBE[0] + gap)
+    o[:, 1] = r * (SIZE_CUBE[1] + gap)
+    add_blocks(ax, o, SIZE_CUBE, color)
+
+DRAWERS = {"O": draw_cubes, "T": draw_plates, "H": draw_rods, "K": draw_micros}
+
+# ────────── 패널 래스터화 ──────────
+# st.pyplot 기본값과 동일한 저장 옵션(화면에 보이는 결과가 바뀌지 않도록)
+SAVEFIG_OPTS = {"format": "png", "dpi": 200, "bbox_inches": "tight"}
+
+def draw_panel(ax, kind: str, count: int, color=None, label=None):
+    DRAWERS[kind](ax, count, color or KIND_COLORS[kind])
+    if label and label == kind and kind in LABELS:
+        ax.text(0.0, 0.0, 2.45, LABELS[kind], color="#0F766E", fontsize=14, weight="bold")
+
+# ────────── 장면 풀 ──────────
+# 장면(Figure + 3D 축: 투영·비율·시점·범위·눈금 설정)은 만들어 둔 것을 재사용하고 블록·라벨만 바꿔 그린다.
+# 동시에 그리는 스레드 수만큼만 늘어나고, SCENE_POOL_MAX개까지 보관.
+SCENE_POOL_MAX = 4
+_SCENES: List[Tuple[Figure, object]] = []
+_SCENES_LOCK = threading.Lock()
+
+@contextmanager
+def pooled_scene():
+    """빈 장면 (fig, ax)를 빌려 주고, 끝나면 그린 것을 지우고 돌려받는다."""
+    with _SCENES_LOCK:
+        scene = _SCENES.pop() if _SCENES else None
+    if scene is None:
+        with timed("render.scene"):
+            scene = scene_axes()
+    ax = scene[1]
+    try:
+        yield scene
+    finally:
+        for artist in (*ax.collections, *ax.texts):
+            artist.remove()
+        with _SCENES_LOCK:
+            if len(_SCENES) < SCENE_POOL_MAX:
+                _SCENES.append(scene)
+
+def rasterize_panel(kind: str, count: int, color=None, label=None) -> bytes:
+    with pooled_scene() as (fig, ax):
+        with timed("render.draw"):
+            draw_panel(ax, kind, count, color, label)
+        with timed("render.rasterize"):
+            buf = io.BytesIO()
+            fig.savefig(buf, **SAVEFIG_OPTS)
+        return buf.getvalue()
+
+# ────────── 스프라이트 캐시 ──────────
+# 상태 공간이 작아서(4종 × 0~19개 × 라벨 유무 × 기본/깜빡임 색) 전부 메모리에 둔다.
+MAX_COUNT = 19
+
+SpriteKey = Tuple[str, int, Tuple[float, ...], Optional[str]]
+_SPRITES: Dict[SpriteKey, bytes] = {}
+
+def sprite_key(kind: str, count: int, color=None, label=None) -> SpriteKey:
+    color = tuple(color or KIND_COLORS[kind])
+    label = label if (label == kind and kind in LABELS) else None
+    return (kind, int(count), color, label)
+
+def panel_png(kind: str, count: int, color=None, label=None) -> bytes:
+    """(kind, count, color, label)에 해당하는 패널 PNG. 최초 1회만 그린다."""
+    key = sprite_key(kind, count, color, label)
+    png = _SPRITES.get(key)
+    if png is None:
+        # 장면마다 따로 그리므로 잠금 없음(드물게 같은 키를 두 스레드가 그려도 결과는 같음)
+        png = _SPRITES.setdefault(key, rasterize_panel(*key))
+    return png
+
+def sprite_keys():
+    """애니메이션/깜빡임에서 나올 수 있는 모든 패널 상태."""
+    for kind in ("O", "T", "H", "K"):
+        for n in range(MAX_COUNT + 1):
+            yield sprite_key(kind, n)
+            yield sprite_key(kind, n, COLOR_FLASH)
+            if kind in LABELS:
+                yield sprite_key(kind, n, label=kind)
+
+def warm_sprite_cache() -> int:
+    """모든 스프라이트를 미리 그려 둔다(프로세스당 1회). 새로 그린 개수를 반환."""
+    made = 0
+    for key in sprite_keys():
+        if key not in _SPRITES:
+            panel_png(*key)
+            made += 1
+    return made
+
+def sprite_cache_size() -> int:
+    return len(_SPRITES)
+
+gauge_source("sprites", lambda: {"cached": len(_SPRITES)})
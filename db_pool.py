@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# submissions.db 연결 풀 — 읽기 전용 리더 여러 개 + 전용 라이터 1개
+# - reader(): 읽기 전용(mode=ro, query_only) 연결을 빌려줌. 빌린 동안은 그 스레드만 사용, 끝나면 반납
+#   WAL 모드라 리더는 쓰기(제출 INSERT)를 기다리지 않고, 같은 연결을 여러 스레드가 섞어 쓰지도 않음
+# - writer(): 쓰기 연결 1개를 잠금으로 보호해 한 번에 한 스레드만 사용(스키마 변경·제출 저장)
+# - stats(): 대여 횟수, 대기 횟수/시간, 열린 연결 수 — 모니터링용
+# - get_pool(path): 경로별 프로세스 공용 풀(메인 앱·교사 대시보드가 같은 풀을 씀)
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+MAX_READERS  = 8      # 동시에 열어 둘 읽기 연결 상한
+BUSY_TIMEOUT = 30.0   # 잠금 대기(초)
+
+class ConnectionPool:
+    def __init__(self, db_path: str, max_readers: int = MAX_READERS, busy_timeout: float = BUSY_TIMEOUT):
+        self.db_path = str(db_path)
+        self.busy_timeout = busy_timeout
+        self._slots = threading.BoundedSemaphore(max_readers)
+        self._idle: List[sqlite3.Connection] = []
+        self._idle_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = sqlite3.connect(self.db_path, timeout=busy_timeout, check_same_thread=False)
+        self._writer.execute("PRAGMA journal_mode=WAL;")
+        self._writer.execute("PRAGMA synchronous=NORMAL;")
+        self._stats = {
+            "reader_checkouts": 0, "reader_waits": 0, "reader_wait_s": 0.0, "readers_opened": 0,
+            "writer_checkouts": 0, "writer_waits": 0, "writer_wait_s": 0.0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def _count(self, kind: str, waited: float):
+        with self._stats_lock:
+            self._stats[f"{kind}_checkouts"] += 1
+            if waited:
+                self._stats[f"{kind}_waits"] += 1
+                self._stats[f"{kind}_wait_s"] += waited
+
+    @staticmethod
+    def _acquire(lock) -> float:
+        """잠금/슬롯을 얻는다. 바로 얻으면 0, 기다렸으면 기다린 시간(초)."""
+        if lock.acquire(blocking=False):
+            return 0.0
+        t0 = time.perf_counter()
+        lock.acquire()
+        return time.perf_counter() - t0
+
+    # ── 읽기 ──
+    def _open_reader(self) -> sqlite3.Connection:
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=self.busy_timeout, check_same_thread=False)
+        conn.execute("PRAGMA query_only=ON;")
+        with self._stats_lock:
+            self._stats["readers_opened"] += 1
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        waited = self._acquire(self._slots)
+        try:
+            with self._idle_lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._open_reader()
+            self._count("reader", waited)
+            try:
+                yield conn
+            finally:
+                conn.rollback()   # 열린 읽기 트랜잭션이 남아 WAL 체크포인트를 막지 않도록
+                with self._idle_lock:
+                    self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    # ── 쓰기 ──
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        waited = self._acquire(self._write_lock)
+        try:
+            self._count("writer", waited)
+            yield self._writer
+        finally:
+            self._write_lock.release()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            out = dict(self._stats)
+        with self._idle_lock:
+            out["readers_idle"] = len(self._idle)
+        return out
+
+_POOLS: Dict[str, ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+def get_pool(db_path) -> ConnectionPool:
+    key = str(Path(db_path).resolve())
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = ConnectionPool(key)
+        return pool
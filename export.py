@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# 제출 내보내기 — Parquet / Arrow IPC / CSV (청크 단위 스트리밍) + 압축 스냅숏
+# - DB 커서에서 CHUNK_ROWS행씩 읽어 Arrow RecordBatch로 바꾼 뒤 바로 출력 → 전체 표를 메모리에 올리지 않음
+# - export_file(): 다운로드용 디스크 임시 파일(읽기 전용으로 다시 연 파일 객체). 동시 생성 수 제한
+# - 스키마는 ARROW_SCHEMA로 고정(정수/문자열/시각 타입 유지) → 여러 학교 파일을 그대로 이어 붙여 집계 가능
+# - CSV는 엑셀 호환(UTF-8 BOM), 커서 청크를 csv 모듈로 바로 기록
+# - 스냅숏: 데이터 폴더/snapshots 에 zstd 압축 Parquet로 원자적 저장, 최근 SNAPSHOT_KEEP개만 유지
+#   start_snapshots(): 백그라운드에서 주기적으로(새 제출이 있을 때만) 스냅숏 — 앱은 BLOCKS_SNAPSHOTS=1 일 때만 시작
+# - Streamlit 비의존
+
+import csv
+import io
+import os
+import tempfile
+import threading
+import time
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from metrics import timed
+from storage import DATA_DIR, data_version, get_db, submission_filter
+
+CHUNK_ROWS = 10_000
+
+KST = ZoneInfo("Asia/Seoul")
+
+ARROW_SCHEMA = pa.schema([
+    ("id",             pa.int64()),
+    ("timestamp",      pa.timestamp("s", tz="Asia/Seoul")),
+    ("class",          pa.string()),
+    ("nickname",       pa.string()),
+    ("quest",          pa.string()),
+    ("rubric_1",       pa.int8()),
+    ("rubric_2",       pa.int8()),
+    ("rubric_3",       pa.int8()),
+    ("rubric_total",   pa.int8()),
+    ("guess_mode",     pa.string()),
+    ("guess_value",    pa.string()),
+    ("guess_correct",  pa.int8()),
+    ("correct_answer", pa.string()),
+])
+# DB에서 읽는 순서(timestamp 자리는 정수 ts_epoch)
+_SELECT_COLS = ["ts_epoch" if f.name == "timestamp" else f.name for f in ARROW_SCHEMA]
+
+# 기존 CSV와 같은 모양: id 없이, 시각은 저장된 KST 문자열 그대로
+CSV_COLS = [f.name for f in ARROW_SCHEMA if f.name != "id"]
+
+def iter_rows(cols: Sequence[str], start=None, end=None, classes: Optional[Sequence[str]] = None,
+              chunk_rows: int = CHUNK_ROWS) -> Iterator[list]:
+    """필터에 맞는 제출을 id 순으로 chunk_rows행(튜플 목록)씩. 커서에서 바로 읽어 전체를 모으지 않음."""
+    where, params = submission_filter(start, end, classes)
+    q = f"SELECT {', '.join(cols)} FROM submissions {where} ORDER BY id"
+    with get_db().reader() as conn:
+        cur = conn.execute(q, params)
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield rows
+
+def iter_batches(start=None, end=None, classes: Optional[Sequence[str]] = None,
+                 chunk_rows: int = CHUNK_ROWS) -> Iterator[pa.RecordBatch]:
+    for rows in iter_rows(_SELECT_COLS, start, end, classes, chunk_rows):
+        arrays = []
+        for field, values in zip(ARROW_SCHEMA, zip(*rows)):
+            if field.name == "timestamp":
+                arrays.append(pa.array(values, pa.int64()).cast(field.type))
+            else:
+                arrays.append(pa.array(values, field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=ARROW_SCHEMA)
+
+# ────────── 형식별 쓰기(sink: 바이너리 파일 객체, 반환: 행 수) ──────────
+def write_parquet(sink: BinaryIO, start=None, end=None, classes=None, compression: str = "zstd") -> int:
+    n = 0
+    with pq.ParquetWriter(sink, ARROW_SCHEMA, compression=compression) as w:
+        for b in iter_batches(start, end, classes):
+            w.write_batch(b); n += b.num_rows
+    return n
+
+def write_arrow(sink: BinaryIO, start=None, end=None, classes=None, compression: Optional[str] = "zstd") -> int:
+    n = 0
+    opts = ipc.IpcWriteOptions(compression=compression)
+    with ipc.new_file(sink, ARROW_SCHEMA, options=opts) as w:
+        for b in iter_batches(start, end, classes):
+            w.write_batch(b); n += b.num_rows
+    return n
+
+def write_csv(sink: BinaryIO, start=None, end=None, classes=None) -> int:
+    """엑셀 호환 CSV(UTF-8 BOM). pandas를 거치지 않고 커서 청크를 그대로 기록."""
+    n = 0
+    text = io.TextIOWrapper(sink, encoding="utf-8-sig", newline="")
+    try:
+        w = csv.writer(text)
+        w.writerow(CSV_COLS)
+        for rows in iter_rows(CSV_COLS, start, end, classes):
+            w.writerows(rows); n += len(rows)
+        text.flush()
+    finally:
+        text.detach()   # sink는 호출 측이 닫음
+    return n
+
+# 형식 → (쓰기 함수, 확장자, MIME)
+FORMATS = {
+    "parquet": (write_parquet, ".parquet", "application/vnd.apache.parquet"),
+    "arrow":   (write_arrow,   ".arrow",   "application/vnd.apache.arrow.file"),
+    "csv":     (write_csv,     ".csv",     "text/csv"),
+}
+
+# 동시에 만드는 내보내기 수 제한(학기말 여러 교사가 한꺼번에 눌러도 메모리/CPU가 튀지 않도록)
+MAX_CONCURRENT_EXPORTS = 2
+_EXPORT_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_EXPORTS)
+
+def export_file(fmt: str, start=None, end=None, classes: Optional[Sequence[str]] = None) -> BinaryIO:
+    """필터 결과를 CHUNK_ROWS행씩 디스크 임시 파일에 기록한 뒤 읽기 전용(rb)으로 다시 연 파일 객체로 반환.
+    쓰는 동안 메모리는 청크 하나 크기. st.download_button이 받는 형식(BufferedReader)이라 그대로 넘기면 되고,
+    그 뒤 파일 전체를 한 번 읽어 가는 것은 Streamlit(미디어 파일 저장소) 쪽. 이름은 바로 지워 닫히면 사라짐."""
+    f = tempfile.NamedTemporaryFile(prefix="blocks-export-", suffix=FORMATS[fmt][1], delete=False)
+    path = f.name
+    try:
+        with f, _EXPORT_SLOTS, timed(f"export.{fmt}"):
+            FORMATS[fmt][0](f, start, end, classes)
+    except Exception:
+        os.unlink(path)
+        raise
+    out = open(path, "rb")
+    try:
+        os.unlink(path)   # POSIX: 열린 파일은 닫힐 때까지 남음
+    except OSError:
+        weakref.finalize(out, _unlink_quietly, path)   # Windows: 열린 파일은 지울 수 없어 닫힌 뒤에
+    return out
+
+def _unlink_quietly(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+# ────────── 스냅숏 ──────────
+SNAPSHOTS_ENABLED = os.environ.get("BLOCKS_SNAPSHOTS", "").lower() in ("1", "true", "yes", "on")
+SNAPSHOT_DIR      = DATA_DIR / "snapshots"
+SNAPSHOT_KEEP     = 24
+SNAPSHOT_INTERVAL = 3600.0   # 초
+
+def write_snapshot(fmt: str = "parquet", out_dir: Path = SNAPSHOT_DIR, keep: int = SNAPSHOT_KEEP) -> Path:
+    """전체 제출을 압축 파일로 저장(임시 파일 → 이름 바꾸기). 오래된 스냅숏은 keep개만 남김."""
+    write, ext, _ = FORMATS[fmt]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"submissions-{datetime.now(KST):%Y%m%d-%H%M%S}{ext}"
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+    for old in sorted(out_dir.glob(f"submissions-*{ext}"))[:-keep]:
+        old.unlink(missing_ok=True)
+    return path
+
+def start_snapshots(interval: float = SNAPSHOT_INTERVAL, fmt: str = "parquet") -> threading.Thread:
+    """interval초마다 새 제출이 있으면 스냅숏(데몬 스레드)."""
+    def run():
+        last = None
+        while True:
+            try:
+                cur = data_version()
+                if cur and cur != last:
+                    write_snapshot(fmt)
+                    last = cur
+            except Exception:
+                pass   # 다음 주기에 다시 시도
+            time.sleep(interval)
+    th = threading.Thread(target=run, name="submission-snapshots", daemon=True)
+    th.start()
+    return th
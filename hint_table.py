@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Decimal Blocks 3D — 힌트 조회 테이블(NumPy, 메모리 맵)
+# - 0.000~9.999 두 수의 모든 쌍에 대한 받아올림/받아내림 여부 + 자리별 부분합을 미리 계산
+# - 받아올림/받아내림/부분합은 소수 부분(0.1·0.01·0.001자리)에만 의존 → 1000×1000 표 하나로 전체 쌍을 덮음
+#   (일의 자리는 어떤 판정에도 쓰이지 않음. 정답 자체는 천분의 일 단위 정수 a±b로 바로 계산)
+# - 표는 .npy로 저장해 두고 np.load(mmap_mode="r")로 필요할 때만 읽음 → 조회 O(1)
+# - 판정 규칙은 예전 '정답 확인' 힌트 계산(자리별 받아올림·부분합·받아내림)과 같음, 모든 쌍을 한 번에(벡터화)
+
+import os
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+# 플래그 비트
+CARRY_K, CARRY_H, CARRY_T    = 1, 2, 4      # 덧셈 받아올림(0.001 / 0.01 / 0.1자리)
+BORROW_K, BORROW_H, BORROW_T = 8, 16, 32    # 뺄셈 받아내림(0.001 / 0.01 / 0.1자리)
+
+# 표 레이아웃: uint8 (4, 1000, 1000) — [플래그, 0.001자리 부분합, 0.01자리 부분합, 0.1자리 부분합]
+LAYER_FLAGS, LAYER_K_SUM, LAYER_H_SUM, LAYER_T_SUM = 0, 1, 2, 3
+SHAPE = (4, 1000, 1000)
+
+def build_table() -> np.ndarray:
+    """소수 부분(000~999) 모든 쌍의 플래그/부분합을 한 번에 계산."""
+    f = np.arange(1000, dtype=np.int16)
+    t, h, k = f // 100, f // 10 % 10, f % 10
+    at, ah, ak = t[:, None], h[:, None], k[:, None]
+    bt, bh, bk = t[None, :], h[None, :], k[None, :]
+
+    # 덧셈: 받아올림 / 부분합
+    carry_k = (ak + bk) >= 10
+    carry_h = (ah + bh + carry_k) >= 10
+    carry_t = (at + bt + carry_h) >= 10
+    k_sum = ak + bk
+    h_sum = ah + bh + (k_sum >= 10)
+    t_sum = at + bt + (h_sum >= 10)
+
+    # 뺄셈: 받아내림(힌트 규칙 그대로)
+    need_k = ak < bk
+    need_h = (ah - need_k) < bh
+    need_t = (at - (need_h | ((ah == bh) & need_k))) < bt
+
+    flags = (carry_k * CARRY_K + carry_h * CARRY_H + carry_t * CARRY_T
+             + need_k * BORROW_K + need_h * BORROW_H + need_t * BORROW_T)
+    out = np.empty(SHAPE, dtype=np.uint8)
+    out[LAYER_FLAGS] = flags
+    out[LAYER_K_SUM] = np.broadcast_to(k_sum, SHAPE[1:])
+    out[LAYER_H_SUM] = h_sum
+    out[LAYER_T_SUM] = t_sum
+    return out
+
+def load_table(path) -> np.ndarray:
+    """저장된 표를 메모리 맵으로 연다. 없거나 모양이 다르면 새로 만들어 저장."""
+    path = Path(path)
+    try:
+        table = np.load(path, mmap_mode="r")
+        if table.shape == SHAPE and table.dtype == np.uint8:
+            return table
+    except Exception:
+        pass
+    table = build_table()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, table)
+        os.replace(tmp, path)
+        return np.load(path, mmap_mode="r")
+    except Exception:
+        # 저장이 안 되는 환경이면 메모리에 만든 표를 그대로 사용
+        return table
+
+# ────────── 조회 ──────────
+def frac_index(d) -> int:
+    """(o, t, h, k) 자리 숫자 → 소수 부분 인덱스(0~999)."""
+    return d[1] * 100 + d[2] * 10 + d[3]
+
+def add_hint(table, a, b) -> Tuple[int, int, int, int, int, int]:
+    """(carry_k, carry_h, carry_t, k_sum, h_sum, t_sum)"""
+    i, j = frac_index(a), frac_index(b)
+    fl = int(table[LAYER_FLAGS, i, j])
+    return (int(bool(fl & CARRY_K)), int(bool(fl & CARRY_H)), int(bool(fl & CARRY_T)),
+            int(table[LAYER_K_SUM, i, j]), int(table[LAYER_H_SUM, i, j]), int(table[LAYER_T_SUM, i, j]))
+
+def sub_hint(table, a, b) -> Tuple[bool, bool, bool]:
+    """(need_k, need_h, need_t)"""
+    fl = int(table[LAYER_FLAGS, frac_index(a), frac_index(b)])
+    return bool(fl & BORROW_K), bool(fl & BORROW_H), bool(fl & BORROW_T)
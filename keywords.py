@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# 학생 답변 키워드 — 토큰 규칙(토크나이저 + 조사 떼기)
+# - 토큰: 한/영/숫자 연속 문자열(소문자), 2자 미만·숫자만·불용어 제외
+# - 한글 토큰 끝의 조사(은/는/이/가/을/를/에서/으로 …)를 떼어 "막대가"·"막대를"을 "막대"로 합침(어간 2자 이상일 때만)
+# - 서로 다른 토큰(어휘) Series에 pandas 문자열 연산으로 한 번에 적용(행마다 파이썬 루프 없음)
+# - 대시보드 키워드 빈도·검색은 search_index(일별 토큰 집계표·FTS5 색인)에서 — 여기서는 토큰 규칙만 제공
+# - Streamlit 비의존
+
+import re
+from typing import List
+
+import pandas as pd
+
+TOKEN_RE = r"[가-힣a-z0-9]+"
+
+STOPWORDS = frozenset([
+    "그리고","그래서","하지만","혹은","또는","또","즉","이건","저는","제가","우리는","너무",
+    "정답","오답","받아올림","받아내림","합","차","문제","과제","설명","으로","에서","하다","했다",
+    "입니다","예","아니오","예시","같은","이번","오늘","합니다","했던","있는","없는","어떻게","왜",
+    "수","숫자","자리","소수","첫째","둘째","셋째","자리수","계산","빌리다","더하다","빼다"
+])
+
+# 긴 조사부터(“에서는”이 “는”보다 먼저 맞도록)
+PARTICLES = ("에서는", "으로는", "에게서", "에서", "으로", "에게", "한테", "까지", "부터", "처럼", "보다",
+             "이랑", "이나", "은", "는", "이", "가", "을", "를", "에", "의", "도", "와", "과", "로", "만", "랑")
+PARTICLE_RE = rf"^([가-힣]{{2,}}?)(?:{'|'.join(PARTICLES)})$"
+
+def normalize_terms(terms: pd.Series, strip_particles: bool = True) -> pd.Series:
+    """서로 다른 토큰(어휘) Series → 조사 뗀 키워드, 쓰지 않을 토큰(2자 미만·숫자만·불용어·기타 문자)은 None."""
+    terms = pd.Series(terms, dtype=object)
+    if strip_particles:
+        terms = terms.str.replace(PARTICLE_RE, r"\1", regex=True)
+    drop = (~terms.str.fullmatch(TOKEN_RE).fillna(False).astype(bool) | (terms.str.len() < 2)
+            | terms.str.isdigit() | terms.isin(STOPWORDS))
+    return terms.mask(drop, None)
+
+def query_terms(text: str) -> List[str]:
+    """검색어 → 낱말 목록(소문자, 조사 뗌). 키워드 집계와 달리 불용어·짧은 낱말도 남긴다."""
+    return list(dict.fromkeys(re.sub(PARTICLE_RE, r"\1", t) for t in re.findall(TOKEN_RE, str(text).lower())))
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# 구간별 소요 시간 계측(선택 기능) — 프로세스 단위 히스토그램
+# - 환경 변수 BLOCKS_METRICS=1 일 때만 기록(꺼져 있으면 timed()는 아무것도 하지 않음)
+# - 이름별 히스토그램(고정 버킷, ms) + 개수/합계, 스레드 안전
+# - timed("이름"): with 문 / 데코레이터 둘 다 사용
+# - 게이지: 모듈이 gauge_source(접두어, 함수)로 현재 값(연결 풀 통계, 스프라이트 수 등)을 알려 둠 — 계측 여부와 무관
+# - 내보내기: snapshot()(진단 화면용 표), prometheus_text()(Prometheus 텍스트 형식),
+#   start_prometheus_file(): 데이터 폴더/metrics.prom 에 주기적으로 기록(node_exporter textfile 수집기용)
+# - Streamlit 비의존
+
+import functools
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ENABLED = os.environ.get("BLOCKS_METRICS", "").lower() in ("1", "true", "yes", "on")
+
+# 버킷 상한(ms). 마지막은 +Inf
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+PROM_PREFIX = "decimal_blocks"
+PROM_INTERVAL = 15.0   # 초
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum_ms", "max_ms", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms: float):
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+            i += 1
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    def quantile(self, q: float) -> float:
+        """버킷 안에서 선형 보간한 근사 분위수(ms)."""
+        with self._lock:
+            counts, total, top = list(self.counts), self.count, self.max_ms
+        if not total:
+            return float("nan")
+        rank, seen, lo = q * total, 0, 0.0
+        for i, c in enumerate(counts):
+            hi = BUCKETS_MS[i] if i < len(BUCKETS_MS) else top
+            if c and seen + c >= rank:
+                return min(lo + (hi - lo) * (rank - seen) / c, top)
+            seen += c
+            lo = hi
+        return top
+
+_HISTS: Dict[str, Histogram] = {}
+_HISTS_LOCK = threading.Lock()
+
+def observe(name: str, ms: float):
+    h = _HISTS.get(name)
+    if h is None:
+        with _HISTS_LOCK:
+            h = _HISTS.setdefault(name, Histogram())
+    h.observe(ms)
+
+class timed:
+    """구간 시간을 name 히스토그램에 기록. `with timed("db.fetch_recent"):` 또는 `@timed("...")`."""
+    __slots__ = ("name", "_t0")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._t0 = None
+
+    def __enter__(self):
+        self._t0 = time.perf_counter() if ENABLED else None
+        return self
+
+    def __exit__(self, *exc):
+        if self._t0 is not None:
+            observe(self.name, (time.perf_counter() - self._t0) * 1000)
+        return False
+
+    def __call__(self, fn: Callable) -> Callable:
+        name = self.name
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, (time.perf_counter() - t0) * 1000)
+        return wrapper
+
+# ────────── 게이지 ──────────
+_GAUGES: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+def gauge_source(prefix: str, fn: Callable[[], Dict[str, float]]):
+    """prefix.이름 → 값 을 돌려주는 함수 등록(같은 prefix는 교체)."""
+    _GAUGES[prefix] = fn
+
+def gauges() -> Dict[str, float]:
+    out = {}
+    for prefix, fn in list(_GAUGES.items()):
+        try:
+            for k, v in fn().items():
+                out[f"{prefix}.{k}"] = v
+        except Exception:
+            pass
+    return out
+
+def reset():
+    with _HISTS_LOCK:
+        _HISTS.clear()
+
+def _items():
+    with _HISTS_LOCK:
+        return sorted(_HISTS.items())
+
+def snapshot() -> List[dict]:
+    """이름순 요약: 횟수, 평균/p50/p95/최대(ms), 합계(s)."""
+    rows = []
+    for name, h in _items():
+        if not h.count:
+            continue
+        rows.append({
+            "name": name, "count": h.count,
+            "mean_ms": round(h.sum_ms / h.count, 2),
+            "p50_ms": round(h.quantile(0.50), 2),
+            "p95_ms": round(h.quantile(0.95), 2),
+            "max_ms": round(h.max_ms, 2),
+            "total_s": round(h.sum_ms / 1000, 3),
+        })
+    return rows
+
+# ────────── Prometheus 텍스트 형식 ──────────
+def _label(name: str) -> str:
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+def prometheus_text() -> str:
+    """모든 히스토그램(초 단위, stage 라벨) + 등록된 게이지."""
+    h_name = f"{PROM_PREFIX}_stage_seconds"
+    out = [f"# HELP {h_name} Time spent per instrumented stage.", f"# TYPE {h_name} histogram"]
+    for name, h in _items():
+        with h._lock:
+            counts, total, sum_ms = list(h.counts), h.count, h.sum_ms
+        stage = _label(name)
+        acc = 0
+        for le, c in zip(BUCKETS_MS, counts):
+            acc += c
+            out.append(f'{h_name}_bucket{{stage="{stage}",le="{le / 1000:g}"}} {acc}')
+        out.append(f'{h_name}_bucket{{stage="{stage}",le="+Inf"}} {total}')
+        out.append(f'{h_name}_sum{{stage="{stage}"}} {sum_ms / 1000:.6f}')
+        out.append(f'{h_name}_count{{stage="{stage}"}} {total}')
+    for name, value in sorted(gauges().items()):
+        g = f"{PROM_PREFIX}_{_metric_name(name)}"
+        out += [f"# TYPE {g} gauge", f"{g} {value}"]
+    return "\n".join(out) + "\n"
+
+def write_prometheus(path: Path):
+    """임시 파일에 쓴 뒤 이름 바꾸기(수집기가 반쯤 쓴 파일을 읽지 않도록)."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(prometheus_text(), encoding="utf-8")
+    os.replace(tmp, path)
+
+def start_prometheus_file(path: Path, interval: float = PROM_INTERVAL) -> threading.Thread:
+    """interval초마다 path에 Prometheus 텍스트 기록(데몬 스레드)."""
+    def run():
+        while True:
+            try:
+                write_prometheus(path)
+            except Exception:
+                pass   # 다음 주기에 다시 시도
+            time.sleep(interval)
+    th = threading.Thread(target=run, name="metrics-prometheus", daemon=True)
+    th.start()
+    return th
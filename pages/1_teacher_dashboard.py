@@ -3,29 +3,60 @@
 # - 접근 제어: st.session_state["teacher_ok"] 필요
 # - 필터: 날짜 / 학급
 # - KPIs: 총 제출, 평균 자기평가, 전체 정답률, 최근 제출 시각
-# - 탭:
+# - 보기 5종(세그먼트 선택, 선택한 보기만 계산·렌더링):
 #   1) 전체 정답률(도넛) + 분포
 #   2) 학급별 정답률(막대)
 #   3) 학급별 제출 수(막대)
 #   4) 날짜별 제출 추이(선)
-#   5) 학생 답변 키워드(상위 30, 가벼운 토크나이저)
+#   5) 학생 답변 키워드(상위 30, 전문 검색 색인) + 키워드/검색어로 답변 찾기
+# - 파생 표·KPI·키워드·검색 결과는 (기간, 학급, 데이터 버전) 키로 캐시 → 탭/토글 조작 시 재계산 없음
+# - 숨김 진단 화면(?diag=1): 구간별 소요 시간 히스토그램, 연결 풀·스프라이트 값, Prometheus 텍스트
 
-import re
-import sqlite3
-from pathlib import Path
-from contextlib import closing
+import time
 from datetime import date, timedelta
 
 import pandas as pd
 import streamlit as st
 
+from rollup import RUBRIC_BUCKETS
+from storage import get_db, data_version, date_bounds, fetch_daily, keyword_counts, search_submissions
+from export import FORMATS, export_file
+import metrics
+from metrics import timed
+
 st.set_page_config(page_title="교사 대시보드", page_icon="📊", layout="wide")
+DASH_T0 = time.perf_counter()   # 이번 실행 전체 시간(dash.rerun)
 
 # ────────── 접근 제어 ──────────
 if not st.session_state.get("teacher_ok", False):
     st.error("교사 전용 페이지입니다. 메인 화면 사이드바에서 '교사' 선택 후 비밀번호를 입력하세요.")
     st.stop()
 
+# ────────── 진단(숨김: 주소 끝에 ?diag=1, 교사 전용) ──────────
+if st.query_params.get("diag") == "1":
+    st.title("🩺 진단")
+    get_db()   # 연결 풀 게이지 등록
+    if not metrics.ENABLED:
+        st.info("구간별 시간 기록이 꺼져 있습니다. 서버를 환경 변수 BLOCKS_METRICS=1로 시작하면 기록됩니다.")
+    rows = metrics.snapshot()
+    st.markdown("#### 구간별 소요 시간(이 프로세스, 시작 이후 누적)")
+    if rows:
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    else:
+        st.caption("아직 기록이 없습니다.")
+    st.markdown("#### 현재 값")
+    st.dataframe(pd.Series(metrics.gauges(), dtype=float).rename_axis("항목").reset_index(name="값"),
+                 use_container_width=True, hide_index=True)
+    prom = metrics.prometheus_text()
+    with st.expander("Prometheus 텍스트"):
+        st.code(prom, language="text")
+    dl, rs = st.columns(2)
+    dl.download_button("metrics.prom 다운로드", prom, file_name="metrics.prom", mime="text/plain")
+    if rs.button("기록 초기화"):
+        metrics.reset()
+        st.rerun()
+    st.stop()
+
 # ────────── 자동 새로고침(선택) ──────────
 try:
     from streamlit_autorefresh import st_autorefresh
@@ -34,87 +65,68 @@ try:
 except Exception:
     st.caption("⏱ `streamlit-autorefresh` 미설치 상태(선택). requirements.txt에 `streamlit-autorefresh>=0.0.2` 추가 시 사용 가능.")
 
-# ────────── DB 유틸 (/mount/data 우선) ──────────
-def _writable_data_dir() -> Path:
-    for p in [Path("/mount/data"), Path.cwd() / ".data"]:
-        try:
-            p.mkdir(parents=True, exist_ok=True)
-            t = p / "_wtest"
-            with open(t, "w") as f: f.write("ok")
-            t.unlink(missing_ok=True)
-            return p
-        except Exception:
-            continue
-    Path.cwd().mkdir(parents=True, exist_ok=True)
-    return Path.cwd()
-
-DATA_DIR = _writable_data_dir()
-DB_PATH  = str(DATA_DIR / "submissions.db")
-
-@st.cache_resource
-def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    with conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS submissions(
-              id INTEGER PRIMARY KEY AUTOINCREMENT,
-              timestamp TEXT,
-              class TEXT,
-              nickname TEXT,
-              quest TEXT,
-              rubric_1 INTEGER,
-              rubric_2 INTEGER,
-              rubric_3 INTEGER,
-              rubric_total INTEGER,
-              guess_mode TEXT,
-              guess_value TEXT,
-              guess_correct INTEGER,
-              correct_answer TEXT
-            )
-        """)
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA synchronous=NORMAL;")
-    return conn
-
-def fetch_all() -> pd.DataFrame:
-    conn = get_conn()
-    with closing(conn.cursor()) as cur:
-        cur.execute("""
-          SELECT timestamp, class, nickname, quest,
-                 rubric_1, rubric_2, rubric_3, rubric_total,
-                 guess_mode, guess_value, guess_correct, correct_answer
-          FROM submissions
-          ORDER BY datetime(timestamp) DESC
-        """)
-        cols = ["timestamp","class","nickname","quest",
-                "rubric_1","rubric_2","rubric_3","rubric_total",
-                "guess_mode","guess_value","guess_correct","correct_answer"]
-        rows = cur.fetchall()
-    return pd.DataFrame(rows, columns=cols)
-
 # ────────── 상단 제목/버튼 ──────────
 st.title("📊 교사 대시보드")
 st.caption("모든 시간은 KST(Asia/Seoul) 기준으로 저장·표시됩니다.")
 if st.button("🔄 새로고침"):
     st.rerun()
 
-# ────────── 데이터 로딩 ──────────
-df = fetch_all()
-if df.empty:
+# ────────── 캐시(필터 + 데이터 버전) ──────────
+# 위젯을 만질 때마다 스크립트 전체가 다시 실행되므로 DB 조회·파생 표는 캐시에서.
+# 키에 데이터 버전(최대 id)을 넣어 새 제출이 들어오면 자연히 새로 계산, 지난 키는 TTL·개수 제한으로 정리.
+CACHE_TTL     = 600   # 초
+CACHE_ENTRIES = 64
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_bounds(version: int):
+    return date_bounds()
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+@timed("dash.frames")   # 캐시에 없을 때만 기록됨
+def dashboard_frames(start, end, classes: tuple, version: int) -> dict:
+    """일별 집계표 → KPI 값과 탭 1~4 차트용 표. 제출이 없으면 빈 dict."""
+    roll = fetch_daily(start, end, classes)
+    if roll.empty:
+        return {}
+    n_rubric = roll["n_rubric"].sum()
+    correct_counts = (pd.Series({"정답": roll["n_correct"].sum(), "오답": roll["n_wrong"].sum()})
+                      .loc[lambda s: s > 0].sort_values(ascending=False)
+                      .rename_axis("정답여부").reset_index(name="명"))
+    by_class = roll.groupby("class")[["n", "n_guessed", "n_correct"]].sum()
+    by_class_acc = ((by_class["n_correct"] / by_class["n_guessed"].where(by_class["n_guessed"] > 0))
+                    .mul(100).round(1).rename("정답률(%)").reset_index())
+    return {
+        "total": int(roll["n"].sum()),
+        "avg_rubric": round(roll["rubric_sum"].sum() / n_rubric, 2) if n_rubric else float("nan"),
+        "acc": (roll["n_correct"].sum() / roll["n"].sum() * 100) if roll["n_guessed"].sum() > 0 else None,
+        "last_ts": str(roll["last_ts"].max()),
+        "correct_counts": correct_counts,
+        "by_class_acc": by_class_acc.rename(columns={"class": "학급"}),
+        "by_class_cnt": by_class["n"].sort_values(ascending=False).rename_axis("학급").reset_index(name="제출 수"),
+        "by_day": roll.groupby("date")["n"].sum().rename("제출 수").reset_index().sort_values("date"),
+        "hist": (roll[[f"r{i}" for i in RUBRIC_BUCKETS]].sum()
+                 .set_axis(list(RUBRIC_BUCKETS)).loc[lambda s: s > 0]
+                 .rename_axis("총점(0–6)").reset_index(name="명")),
+    }
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_keywords(start, end, classes: tuple, version: int) -> pd.Series:
+    return keyword_counts(start, end, classes, 30)
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_ENTRIES, show_spinner=False)
+def cached_search(query: str, start, end, classes: tuple, version: int) -> pd.DataFrame:
+    return search_submissions(query, start, end, classes, limit=200)
+
+# ────────── 데이터 범위(일별 집계표) ──────────
+version = data_version()
+min_day, max_day = cached_bounds(version)
+if max_day is None:
     st.warning("아직 제출이 없습니다. 학생 화면에서 제출 후 다시 새로고침하세요.")
     st.stop()
 
-# 전처리
-df["dt"] = pd.to_datetime(df["timestamp"], errors="coerce")
-df["date"] = df["dt"].dt.date
-df["rubric_total"] = pd.to_numeric(df["rubric_total"], errors="coerce")
-df["guess_correct_num"] = pd.to_numeric(df["guess_correct"], errors="coerce")
-
 # ────────── 필터 ──────────
 fltL, fltM, fltR = st.columns([2,2,3])
 with fltL:
-    max_day = df["date"].max()
-    min_day = df["date"].min()
     default_start = max(min_day, (max_day or date.today()) - timedelta(days=14))
     start_day = st.date_input("시작일", value=default_start,
                               min_value=min_day, max_value=max_day or date.today())
@@ -129,57 +141,54 @@ if start_day > end_day:
     st.error("시작일이 종료일보다 늦을 수 없습니다.")
     st.stop()
 
-mask = (df["date"] >= start_day) & (df["date"] <= end_day) & (df["class"].isin(sel_classes))
-fdf = df.loc[mask].copy()
-if fdf.empty:
+# KPI·차트는 일별 집계표에서, 키워드는 검색 색인에서, 내보내기는 원본 행을 청크로
+flt = (start_day, end_day, tuple(sel_classes), version)
+frames = dashboard_frames(*flt)
+if not frames:
     st.info("선택한 조건에 해당하는 제출이 없습니다. 필터를 조정해 주세요.")
     st.stop()
 
 # ────────── KPI ──────────
 K1, K2, K3, K4 = st.columns(4)
 with K1:
-    st.metric("총 제출", len(fdf))
+    st.metric("총 제출", frames["total"])
 with K2:
-    st.metric("평균 자기평가 총점", round(fdf["rubric_total"].dropna().astype(int).mean(), 2))
+    st.metric("평균 자기평가 총점", frames["avg_rubric"])
 with K3:
-    if fdf["guess_correct_num"].notna().any():
-        acc = fdf["guess_correct_num"].fillna(0).astype(int).mean() * 100
-        st.metric("전체 정답률", f"{acc:.0f}%")
-    else:
-        st.metric("전체 정답률", "—")
+    st.metric("전체 정답률", "—" if frames["acc"] is None else f"{frames['acc']:.0f}%")
 with K4:
-    st.metric("최근 제출 시각", str(fdf.sort_values("dt").iloc[-1]["timestamp"]))
+    st.metric("최근 제출 시각", frames["last_ts"])
 
 st.divider()
 
 # ────────── 탭 5종 ──────────
-tabs = st.tabs(["전체 정답률", "학급별 정답률", "학급별 제출 수", "날짜별 제출 추이", "학생 답변 키워드"])
-
-def altair_available() -> bool:
+# st.tabs는 보이지 않는 탭 본문까지 매번 실행하므로, 선택한 보기 하나만 계산·렌더링
+VIEWS = ["전체 정답률", "학급별 정답률", "학급별 제출 수", "날짜별 제출 추이", "학생 답변 키워드"]
+view = st.segmented_control("보기", VIEWS, default=VIEWS[0], key="dash_view",
+                            label_visibility="collapsed") or VIEWS[0]
+
+@st.cache_resource(show_spinner=False)
+def load_altair():
+    """altair 모듈(미설치면 None). 프로세스당 1회, 차트를 그릴 때 처음 import."""
     try:
-        import altair as alt  # noqa
-        return True
+        import altair
+        return altair
     except Exception:
-        return False
+        return None
 
-# 공통 파생 데이터
-correct_counts = fdf["guess_correct_num"].map({1:"정답",0:"오답"}).value_counts().rename_axis("정답여부").reset_index(name="명")
-by_class_acc = (fdf.groupby("class")["guess_correct_num"]
-                .mean().mul(100).round(1).rename("정답률(%)").reset_index())
-by_class_acc = by_class_acc.rename(columns={"class": "학급"})
-by_class_cnt = fdf["class"].value_counts().rename_axis("학급").reset_index(name="제출 수")
-by_day = (fdf.groupby("date").size().rename("제출 수").reset_index().sort_values("date"))
-hist = (fdf["rubric_total"].dropna().astype(int)
-        .value_counts().sort_index().rename_axis("총점(0–6)").reset_index(name="명"))
+correct_counts = frames["correct_counts"]
+by_class_acc   = frames["by_class_acc"]
+by_class_cnt   = frames["by_class_cnt"]
+by_day         = frames["by_day"]
 
 # 1) 전체 정답률
-with tabs[0]:
+if view == VIEWS[0]:
     st.subheader("전체 정답률")
     if correct_counts.empty:
         st.info("정답/오답 데이터가 없습니다.")
     else:
-        if altair_available():
-            import altair as alt
+        alt = load_altair()
+        if alt is not None:
             # 도넛
             donut = alt.Chart(correct_counts).mark_arc(innerRadius=60).encode(
                 theta="명:Q",
@@ -191,14 +200,30 @@ with tabs[0]:
             st.bar_chart(correct_counts.set_index("정답여부"))
     st.caption("왼쪽 KPI에도 전체 정답률이 표시됩니다.")
 
+    st.subheader("자기평가 총점 분포")
+    hist = frames["hist"]
+    if hist.empty:
+        st.info("자기평가 데이터가 없습니다.")
+    else:
+        alt = load_altair()
+        if alt is not None:
+            chart = alt.Chart(hist).mark_bar().encode(
+                x=alt.X("총점(0–6):O"),
+                y=alt.Y("명:Q"),
+                tooltip=["총점(0–6)","명"]
+            ).properties(height=280)
+            st.altair_chart(chart, use_container_width=True)
+        else:
+            st.bar_chart(hist.set_index("총점(0–6)"))
+
 # 2) 학급별 정답률
-with tabs[1]:
+elif view == VIEWS[1]:
     st.subheader("학급별 정답률")
     if by_class_acc.empty:
         st.info("학급별 정답률 데이터가 없습니다.")
     else:
-        if altair_available():
-            import altair as alt
+        alt = load_altair()
+        if alt is not None:
             chart = alt.Chart(by_class_acc).mark_bar().encode(
                 x=alt.X("학급:N", sort="-y"),
                 y=alt.Y("정답률(%):Q"),
@@ -209,13 +234,13 @@ with tabs[1]:
             st.bar_chart(by_class_acc.set_index("학급"))
 
 # 3) 학급별 제출 수
-with tabs[2]:
+elif view == VIEWS[2]:
     st.subheader("학급별 제출 수")
     if by_class_cnt.empty:
         st.info("학급별 제출 데이터가 없습니다.")
     else:
-        if altair_available():
-            import altair as alt
+        alt = load_altair()
+        if alt is not None:
             chart = alt.Chart(by_class_cnt).mark_bar().encode(
                 y=alt.Y("학급:N", sort="-x"),
                 x=alt.X("제출 수:Q"),
@@ -226,13 +251,13 @@ with tabs[2]:
             st.bar_chart(by_class_cnt.set_index("학급"))
 
 # 4) 날짜별 제출 추이
-with tabs[3]:
+elif view == VIEWS[3]:
     st.subheader("날짜별 제출 추이")
     if by_day.empty:
         st.info("날짜별 제출 데이터가 없습니다.")
     else:
-        if altair_available():
-            import altair as alt
+        alt = load_altair()
+        if alt is not None:
             chart = alt.Chart(by_day).mark_line(point=True).encode(
                 x=alt.X("date:T", title="날짜"),
                 y=alt.Y("제출 수:Q"),
@@ -243,63 +268,56 @@ with tabs[3]:
             st.line_chart(by_day.set_index("date"))
 
 # 5) 학생 답변 키워드
-with tabs[4]:
+elif view == VIEWS[4]:
     st.subheader("학생 답변 키워드(상위 30)")
-    # 아주 가벼운 토크나이저(한/영/숫자 연속 토큰 추출)
-    texts = fdf["quest"].dropna().astype(str)
-    if texts.empty:
-        st.info("문항/과제(학생 자유 입력)가 없습니다.")
+    # 답변 전문 검색 색인(FTS5)에서 필터 범위의 토큰 빈도를 집계(조사 떼기 후 합산)
+    top = cached_keywords(*flt)
+    if top.empty:
+        st.info("유의미한 키워드를 찾기 어려웠습니다.")
     else:
-        tokens = []
-        hangul_re = re.compile(r"[가-힣A-Za-z0-9]+")
-        stop = set([
-            "그리고","그래서","하지만","혹은","또는","또","즉","이건","저는","제가","우리는","너무",
-            "정답","오답","받아올림","받아내림","합","차","문제","과제","설명","으로","에서","하다","했다",
-            "입니다","예","아니오","예시","같은","이번","오늘","합니다","했던","있는","없는","어떻게","왜",
-            "수","숫자","자리","소수","첫째","둘째","셋째","자리수","계산","빌리다","더하다","빼다"
-        ])
-        for line in texts:
-            for tok in hangul_re.findall(line.lower()):
-                # 너무 짧은 토큰/숫자만 토큰 제외
-                if len(tok) < 2: 
-                    continue
-                if tok.isdigit():
-                    continue
-                if tok in stop:
-                    continue
-                tokens.append(tok)
-
-        if not tokens:
-            st.info("유의미한 키워드를 찾기 어려웠습니다.")
+        freq = top.rename_axis("키워드").reset_index(name="빈도")
+        alt = load_altair()
+        if alt is not None:
+            chart = alt.Chart(freq).mark_bar().encode(
+                y=alt.Y("키워드:N", sort="-x"),
+                x=alt.X("빈도:Q"),
+                tooltip=["키워드","빈도"]
+            ).properties(height=480)
+            st.altair_chart(chart, use_container_width=True)
+        else:
+            st.bar_chart(freq.set_index("키워드"))
+        with st.expander("표로 보기"):
+            st.dataframe(freq, use_container_width=True, height=420)
+
+    # 키워드/검색어로 해당 답변 보기(필터 적용)
+    st.markdown("#### 🔎 답변 검색")
+    srchL, srchR = st.columns([1,2])
+    with srchL:
+        picked = st.selectbox("상위 키워드", ["(선택 안 함)"] + top.index.tolist(), key="kw_pick")
+    with srchR:
+        typed = st.text_input("검색어(여러 낱말은 모두 포함, 조사는 무시)", key="kw_search")
+    query = typed.strip() or ("" if picked == "(선택 안 함)" else picked)
+    if query:
+        hits = cached_search(query, *flt)
+        if hits.empty:
+            st.info(f"'{query}'이(가) 들어간 답변이 없습니다.")
         else:
-            freq = pd.Series(tokens).value_counts().head(30).rename_axis("키워드").reset_index(name="빈도")
-            if altair_available():
-                import altair as alt
-                chart = alt.Chart(freq).mark_bar().encode(
-                    y=alt.Y("키워드:N", sort="-x"),
-                    x=alt.X("빈도:Q"),
-                    tooltip=["키워드","빈도"]
-                ).properties(height=480)
-                st.altair_chart(chart, use_container_width=True)
-            else:
-                st.bar_chart(freq.set_index("키워드"))
-            with st.expander("표로 보기"):
-                st.dataframe(freq, use_container_width=True, height=420)
+            st.caption(f"'{query}' 검색 결과 {len(hits)}건(최신순, 최대 200건)")
+            st.dataframe(hits[["timestamp","class","nickname","quest","rubric_total"]],
+                         use_container_width=True, hide_index=True)
 
 st.divider()
-csv = fdf.drop(columns=["dt"]).to_csv(index=False).encode("utf-8-sig")
-st.download_button("CSV 다운로드(필터 적용)", csv, file_name="submissions_filtered.csv", mime="text/csv")
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# 내보내기(필터 적용): 버튼을 누를 때만 DB에서 청크 단위로 읽어 임시 파일에 기록
+EXPORT_LABELS = {"csv": "CSV", "parquet": "Parquet", "arrow": "Arrow IPC"}
+expL, expR = st.columns([1,3])
+with expL:
+    fmt = st.selectbox("내보내기 형식", list(EXPORT_LABELS), format_func=EXPORT_LABELS.get, key="export_fmt")
+with expR:
+    _, ext, mime = FORMATS[fmt]
+    st.download_button(f"{EXPORT_LABELS[fmt]} 다운로드(필터 적용)",
+                       lambda: export_file(fmt, start_day, end_day, sel_classes),
+                       file_name=f"submissions_filtered{ext}", mime=mime, on_click="ignore")
+
+# ────────── 계측: 이번 실행 전체 시간 ──────────
+if metrics.ENABLED:
+    metrics.observe("dash.rerun", (time.perf_counter() - DASH_T0) * 1000)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# 제출 일별 집계표(submissions_daily) — 대시보드 KPI/차트용
+# - 키: (day, class, guess_mode)  ※ NULL 학급/유형은 '' 로 저장
+# - 값: 제출 수, 정답 시도 수, 정답/오답 수, 자기평가 총점 합·개수, 총점 0~6 분포, 최근 제출 시각
+# - submissions INSERT 트리거로 유지(추가 전용 표 전제), 집계표가 처음 생길 때 기존 행으로 1회 채움
+# - 생성은 storage의 스키마 마이그레이션에서 호출
+
+import sqlite3
+from datetime import date
+from typing import Optional, Sequence
+
+import pandas as pd
+
+RUBRIC_BUCKETS = range(7)   # 자기평가 총점 0~6
+
+_BUCKET_COLS = ", ".join(f"r{i}" for i in RUBRIC_BUCKETS)
+
+ROLLUP_DDL = f"""
+CREATE TABLE IF NOT EXISTS submissions_daily(
+    day        TEXT NOT NULL,
+    class      TEXT NOT NULL,
+    guess_mode TEXT NOT NULL,
+    n          INTEGER NOT NULL DEFAULT 0,
+    n_guessed  INTEGER NOT NULL DEFAULT 0,
+    n_correct  INTEGER NOT NULL DEFAULT 0,
+    n_wrong    INTEGER NOT NULL DEFAULT 0,
+    n_rubric   INTEGER NOT NULL DEFAULT 0,
+    rubric_sum INTEGER NOT NULL DEFAULT 0,
+    {", ".join(f"r{i} INTEGER NOT NULL DEFAULT 0" for i in RUBRIC_BUCKETS)},
+    last_ts    TEXT,
+    PRIMARY KEY(day, class, guess_mode)
+)
+"""
+
+ROLLUP_TRIGGER = f"""
+CREATE TRIGGER IF NOT EXISTS trg_submissions_daily_ins AFTER INSERT ON submissions
+BEGIN
+    INSERT INTO submissions_daily(day, class, guess_mode, n, n_guessed, n_correct, n_wrong,
+                                  n_rubric, rubric_sum, {_BUCKET_COLS}, last_ts)
+    VALUES (substr(NEW.timestamp, 1, 10), COALESCE(NEW.class, ''), COALESCE(NEW.guess_mode, ''), 1,
+            NEW.guess_correct IS NOT NULL,
+            COALESCE(NEW.guess_correct = 1, 0),
+            COALESCE(NEW.guess_correct = 0, 0),
+            NEW.rubric_total IS NOT NULL,
+            COALESCE(NEW.rubric_total, 0),
+            {", ".join(f"COALESCE(NEW.rubric_total = {i}, 0)" for i in RUBRIC_BUCKETS)},
+            NEW.timestamp)
+    ON CONFLICT(day, class, guess_mode) DO UPDATE SET
+        n          = n + 1,
+        n_guessed  = n_guessed  + excluded.n_guessed,
+        n_correct  = n_correct  + excluded.n_correct,
+        n_wrong    = n_wrong    + excluded.n_wrong,
+        n_rubric   = n_rubric   + excluded.n_rubric,
+        rubric_sum = rubric_sum + excluded.rubric_sum,
+        {", ".join(f"r{i} = r{i} + excluded.r{i}" for i in RUBRIC_BUCKETS)},
+        last_ts    = MAX(COALESCE(last_ts, ''), excluded.last_ts);
+END
+"""
+
+ROLLUP_BACKFILL = f"""
+INSERT INTO submissions_daily(day, class, guess_mode, n, n_guessed, n_correct, n_wrong,
+                              n_rubric, rubric_sum, {_BUCKET_COLS}, last_ts)
+SELECT substr(timestamp, 1, 10), COALESCE(class, ''), COALESCE(guess_mode, ''), COUNT(*),
+       COUNT(guess_correct),
+       SUM(COALESCE(guess_correct = 1, 0)),
+       SUM(COALESCE(guess_correct = 0, 0)),
+       COUNT(rubric_total),
+       COALESCE(SUM(rubric_total), 0),
+       {", ".join(f"SUM(COALESCE(rubric_total = {i}, 0))" for i in RUBRIC_BUCKETS)},
+       MAX(timestamp)
+FROM submissions
+GROUP BY 1, 2, 3
+"""
+
+def create_rollup(conn: sqlite3.Connection):
+    """집계표·트리거 생성(호출 측 트랜잭션 안에서). 집계표가 새로 생긴 경우에만 기존 제출로 채운다."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='submissions_daily'"
+    ).fetchone()
+    if not exists:
+        conn.execute(ROLLUP_DDL)
+        conn.execute(ROLLUP_BACKFILL)
+    conn.execute(ROLLUP_TRIGGER)
+
+def rollup_filter(start=None, end=None, classes: Optional[Sequence[str]] = None):
+    """날짜(포함)·학급 필터 → ("WHERE ..." 또는 "", 파라미터). day/class 열이 있는 일별 표에 공용."""
+    where, params = [], []
+    if start is not None:
+        where.append("day >= ?"); params.append(start.strftime("%Y-%m-%d"))
+    if end is not None:
+        where.append("day <= ?"); params.append(end.strftime("%Y-%m-%d"))
+    if classes is not None:
+        where.append(f"class IN ({','.join('?' * len(classes))})"); params.extend(classes)
+    return ("WHERE " + " AND ".join(where) if where else ""), params
+
+def fetch_rollup(conn: sqlite3.Connection, start=None, end=None,
+                 classes: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """날짜(포함)·학급 필터를 적용한 집계 행. day는 date로 변환해 반환."""
+    where, params = rollup_filter(start, end, classes)
+    df = pd.read_sql_query(f"SELECT * FROM submissions_daily {where}", conn, params=params)
+    df["date"] = pd.to_datetime(df["day"], errors="coerce").dt.date
+    return df
+
+def rollup_date_bounds(conn: sqlite3.Connection):
+    """제출이 있는 첫날·마지막 날(date). 제출이 없으면 (None, None)."""
+    lo, hi = conn.execute(
+        "SELECT MIN(day), MAX(day) FROM submissions_daily WHERE date(day) IS NOT NULL"
+    ).fetchone()
+    if lo is None:
+        return None, None
+    return date.fromisoformat(lo), date.fromisoformat(hi)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# 학생 답변(quest) 전문 검색 색인 — SQLite FTS5
+# - submissions_fts: submissions.quest를 내용으로 쓰는 외부 콘텐츠 FTS5 표(본문은 중복 저장하지 않음)
+# - INSERT/DELETE/UPDATE 트리거로 색인 유지, 색인이 처음 생길 때 기존 행으로 1회 재구성
+# - 키워드 빈도: 일별 토큰 집계표 submissions_terms_daily(day, class, term → 출현 수)
+#   기간·학급 필터는 일별 집계표(rollup)와 같은 조건 → 제출 수가 아니라 (날짜×학급×토큰) 수에 비례
+#   새 제출은 처리한 마지막 id(submissions_terms_state) 뒤의 행만 읽어 더함(마이그레이션 때 전체 1회, 이후 조회 전에)
+#   토큰은 원형(소문자)으로 저장하고 조사 떼기·불용어는 조회 때 서로 다른 토큰에만 적용 → 규칙을 바꿔도 다시 만들 필요 없음
+# - 검색: 입력어를 keywords 규칙(조사 떼기)으로 정리한 뒤 접두어 검색("막대"* → 막대가/막대를 …)
+# - 생성은 storage의 스키마 마이그레이션에서 호출
+
+import sqlite3
+from typing import Optional, Sequence
+
+import pandas as pd
+
+from keywords import TOKEN_RE, normalize_terms, query_terms
+from rollup import rollup_filter
+
+FTS_DDL = """
+CREATE VIRTUAL TABLE submissions_fts USING fts5(
+    quest, content='submissions', content_rowid='id', tokenize='unicode61'
+)
+"""
+TERMS_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS submissions_terms_daily(
+        day   TEXT NOT NULL,
+        class TEXT NOT NULL,
+        term  TEXT NOT NULL,
+        cnt   INTEGER NOT NULL,
+        PRIMARY KEY(day, class, term)
+    ) WITHOUT ROWID
+    """,
+    "CREATE TABLE IF NOT EXISTS submissions_terms_state(upto INTEGER NOT NULL)",
+    "INSERT INTO submissions_terms_state(upto) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM submissions_terms_state)",
+)
+TERMS_UPSERT = """
+    INSERT INTO submissions_terms_daily(day, class, term, cnt) VALUES (?, ?, ?, ?)
+    ON CONFLICT(day, class, term) DO UPDATE SET cnt = cnt + excluded.cnt
+"""
+TERMS_CHUNK_ROWS = 20_000
+
+FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_submissions_fts_ins AFTER INSERT ON submissions
+    BEGIN
+        INSERT INTO submissions_fts(rowid, quest) VALUES (NEW.id, NEW.quest);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_submissions_fts_del AFTER DELETE ON submissions
+    BEGIN
+        INSERT INTO submissions_fts(submissions_fts, rowid, quest) VALUES ('delete', OLD.id, OLD.quest);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_submissions_fts_upd AFTER UPDATE OF quest ON submissions
+    BEGIN
+        INSERT INTO submissions_fts(submissions_fts, rowid, quest) VALUES ('delete', OLD.id, OLD.quest);
+        INSERT INTO submissions_fts(rowid, quest) VALUES (NEW.id, NEW.quest);
+    END
+    """,
+)
+
+def create_search_index(conn: sqlite3.Connection):
+    """색인·트리거·토큰 집계표 생성(호출 측 트랜잭션 안에서). 색인이 새로 생긴 경우에만 기존 제출로 재구성."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='submissions_fts'"
+    ).fetchone()
+    if not exists:
+        conn.execute(FTS_DDL)
+        conn.execute("INSERT INTO submissions_fts(submissions_fts) VALUES ('rebuild')")
+    for ddl in FTS_TRIGGERS + TERMS_DDL:
+        conn.execute(ddl)
+    add_new_terms(conn)
+
+# ────────── 일별 토큰 집계 ──────────
+def terms_behind(conn: sqlite3.Connection) -> bool:
+    """토큰 집계표에 아직 더하지 않은 제출이 있는지(둘 다 키 조회라 즉시)."""
+    return conn.execute(
+        "SELECT (SELECT COALESCE(MAX(id), 0) FROM submissions) > (SELECT upto FROM submissions_terms_state)"
+    ).fetchone()[0] == 1
+
+def add_new_terms(conn: sqlite3.Connection) -> int:
+    """처리한 마지막 id 뒤의 제출을 TERMS_CHUNK_ROWS행씩 토큰으로 나눠 일별 집계표에 더함(호출 측 트랜잭션 안에서).
+    날짜·학급은 일별 집계표와 같은 값(timestamp 앞 10자, NULL 학급은 ''). 더한 제출 수 반환."""
+    upto = conn.execute("SELECT upto FROM submissions_terms_state").fetchone()[0]
+    done = 0
+    while True:
+        chunk = pd.read_sql_query(
+            "SELECT id, substr(timestamp, 1, 10) AS day, COALESCE(class, '') AS class, quest "
+            "FROM submissions WHERE id > ? ORDER BY id LIMIT ?",
+            conn, params=(upto, TERMS_CHUNK_ROWS))
+        if chunk.empty:
+            return done
+        tok = (chunk.set_index(["day", "class"])["quest"].dropna().astype(str)
+               .str.lower().str.findall(TOKEN_RE).explode().dropna())
+        if not tok.empty:
+            counts = tok.rename("term").reset_index().value_counts(["day", "class", "term"])
+            conn.executemany(TERMS_UPSERT, [(*k, int(v)) for k, v in counts.items()])
+        upto = int(chunk["id"].iloc[-1]); done += len(chunk)
+        conn.execute("UPDATE submissions_terms_state SET upto = ?", (upto,))
+
+def keyword_counts(conn: sqlite3.Connection, start=None, end=None,
+                   classes: Optional[Sequence[str]] = None, n: int = 30) -> pd.Series:
+    """기간·학급 필터에 맞는 상위 n개 키워드(키워드 → 빈도). 토큰별 합계는 일별 집계표에서 SQL로,
+    조사 떼기·불용어는 서로 다른 토큰에만 적용해 다시 합친다."""
+    where, params = rollup_filter(start, end, classes)
+    q = f"SELECT term, SUM(cnt) AS cnt FROM submissions_terms_daily {where} GROUP BY term"
+    raw = pd.DataFrame(conn.execute(q, params).fetchall(), columns=["term", "cnt"])
+    if raw.empty:
+        return pd.Series([], dtype="int64")
+    raw["term"] = normalize_terms(raw["term"])
+    counts = raw.dropna().groupby("term")["cnt"].sum()
+    return counts.sort_values(ascending=False, kind="stable").head(n)
+
+def match_query(text: str) -> Optional[str]:
+    """검색어 → FTS5 MATCH 식(모든 낱말을 접두어로 AND). 쓸 만한 낱말이 없으면 None."""
+    terms = query_terms(text)
+    if not terms:
+        return None
+    return " AND ".join(f'"{t}"*' for t in terms)
+
+def search(conn: sqlite3.Connection, text: str, where: str, params: list,
+           columns: Sequence[str], limit: int = 200) -> pd.DataFrame:
+    """검색어가 들어간 제출(최신순). where/params는 storage.submission_filter 결과."""
+    match = match_query(text)
+    if match is None:
+        return pd.DataFrame(columns=list(columns))
+    cond = "id IN (SELECT rowid FROM submissions_fts WHERE submissions_fts MATCH ?)"
+    where = f"{where} AND {cond}" if where else f"WHERE {cond}"
+    q = f"""
+        SELECT {", ".join(columns)}
+        FROM submissions
+        {where}
+        ORDER BY ts_epoch DESC
+        LIMIT ?
+    """
+    return pd.read_sql_query(q, conn, params=list(params) + [match, int(limit)])
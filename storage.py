@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+# 제출 DB 공용 모듈 — 메인 앱·교사 대시보드가 함께 사용
+# - 데이터 폴더(BLOCKS_DATA_DIR → /mount/data → ./.data) 탐색과 예전 submissions.db 복사: import 시 프로세스당 1회
+# - submissions 컬럼 정의(이름·타입)는 COLUMNS 한 곳에서
+# - 스키마는 PRAGMA user_version 기반 마이그레이션으로 관리, get_db() 첫 호출 때 1회만 적용
+# - 조회/저장 함수: fetch_recent(미니 패널), fetch_daily·date_bounds(집계표), data_version(캐시 키),
+#   keyword_counts / search_submissions(답변 전문 검색 색인), add_submission
+# - 조회/저장 함수는 metrics로 계측(db.<함수 이름>), 연결 풀 통계는 게이지로
+# - Streamlit 비의존(프로세스 공용 객체는 모듈 수준에 보관)
+
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple, TypedDict
+
+import pandas as pd
+
+from db_pool import ConnectionPool, get_pool
+from metrics import gauge_source, timed
+from rollup import create_rollup, fetch_rollup, rollup_date_bounds
+import search_index
+from submission_writer import SubmissionWriter, Ticket
+
+# ────────── 데이터 폴더 ──────────
+def _writable_data_dir() -> Path:
+    # Streamlit Cloud에선 /mount/data 가 쓰기 가능. BLOCKS_DATA_DIR로 지정하면 그 폴더를 먼저(벤치마크 등)
+    candidates = [Path("/mount/data"), Path.cwd() / ".data"]
+    if os.environ.get("BLOCKS_DATA_DIR"):
+        candidates.insert(0, Path(os.environ["BLOCKS_DATA_DIR"]))
+    for p in candidates:
+        try:
+            p.mkdir(parents=True, exist_ok=True)
+            test = p / "_wtest"
+            with open(test, "w") as f:
+                f.write("ok")
+            test.unlink(missing_ok=True)
+            return p
+        except Exception:
+            continue
+    # 마지막 안전장치: 현재 폴더 (가능하면)
+    Path.cwd().mkdir(parents=True, exist_ok=True)
+    return Path.cwd()
+
+DATA_DIR = _writable_data_dir()
+DB_PATH  = str(DATA_DIR / "submissions.db")
+
+# 저장소에 예전 submissions.db(읽기 전용)가 있다면 최초 1회 복사
+REPO_DB = Path(__file__).resolve().parent / "submissions.db"
+if REPO_DB.exists() and not (DATA_DIR / "submissions.db").exists():
+    try:
+        shutil.copy2(REPO_DB, DATA_DIR / "submissions.db")
+    except Exception:
+        pass
+
+# ────────── 컬럼 ──────────
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("id",             "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    ("timestamp",      "TEXT"),      # KST "%Y-%m-%d %H:%M:%S"
+    ("class",          "TEXT"),
+    ("nickname",       "TEXT"),
+    ("quest",          "TEXT"),
+    ("rubric_1",       "INTEGER"),
+    ("rubric_2",       "INTEGER"),
+    ("rubric_3",       "INTEGER"),
+    ("rubric_total",   "INTEGER"),
+    ("guess_mode",     "TEXT"),      # "add" | "sub"
+    ("guess_value",    "TEXT"),
+    ("guess_correct",  "INTEGER"),   # 1 | 0 | NULL(시도 없음)
+    ("correct_answer", "TEXT"),
+    ("ts_epoch",       "INTEGER"),   # timestamp와 같은 시각(Unix 초)
+)
+COLS        = [name for name, _ in COLUMNS]
+INSERT_COLS = COLS[1:]
+BASE_COLS   = COLS[:9]
+GUESS_COLS  = COLS[9:13]
+
+# ts_epoch에서 계산되는 KST 날짜 "YYYY-MM-DD"(가상 생성 컬럼, 저장 공간 없음)
+KST_DATE_DDL = "TEXT GENERATED ALWAYS AS (date(ts_epoch, 'unixepoch', '+9 hours')) VIRTUAL"
+
+# 'class'는 예약어라 함수형 TypedDict로 선언
+SubmissionRow = TypedDict("SubmissionRow", {
+    "timestamp": str, "class": str, "nickname": str, "quest": str,
+    "rubric_1": int, "rubric_2": int, "rubric_3": int, "rubric_total": int,
+    "guess_mode": Optional[str], "guess_value": Optional[str],
+    "guess_correct": Optional[int], "correct_answer": Optional[str], "ts_epoch": int,
+}, total=False)
+
+# ────────── 마이그레이션 ──────────
+def _m1_base(conn):
+    # 처음 배포된 표(guess_* 없음) — 이미 있으면 그대로
+    base = ", ".join(f"{n} {t}" for n, t in COLUMNS if n in BASE_COLS)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS submissions({base})")
+
+def _m2_guess_columns(conn):
+    have = {r[1] for r in conn.execute("PRAGMA table_info(submissions)")}
+    for name, ddl in COLUMNS:
+        if name in GUESS_COLS and name not in have:
+            conn.execute(f"ALTER TABLE submissions ADD COLUMN {name} {ddl}")
+
+def _m3_indexes(conn):
+    # 날짜 범위 / 학급+날짜 조회용
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_ts ON submissions(timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_class_ts ON submissions(class, timestamp)")
+
+def _m4_rollup(conn):
+    create_rollup(conn)
+
+# KST 문자열 timestamp → epoch
+EPOCH_FROM_TEXT_UPDATE = (
+    "UPDATE submissions SET ts_epoch = CAST(strftime('%s', timestamp, '-9 hours') AS INTEGER)"
+)
+
+def _m5_epoch(conn):
+    # 문자열 timestamp(KST) → 정수 epoch + 생성 컬럼 kst_date, 조회 인덱스도 정수/날짜 기준으로 교체
+    conn.execute("ALTER TABLE submissions ADD COLUMN ts_epoch INTEGER")
+    conn.execute(f"ALTER TABLE submissions ADD COLUMN kst_date {KST_DATE_DDL}")
+    conn.execute(EPOCH_FROM_TEXT_UPDATE + " WHERE ts_epoch IS NULL")
+    # ts_epoch 없이 들어온 행(이전 버전 코드 등)은 timestamp로 채움
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_submissions_epoch AFTER INSERT ON submissions
+        WHEN NEW.ts_epoch IS NULL
+        BEGIN
+            {EPOCH_FROM_TEXT_UPDATE} WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_submissions_ts")
+    conn.execute("DROP INDEX IF EXISTS idx_submissions_class_ts")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_epoch ON submissions(ts_epoch)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_day ON submissions(kst_date)")
+
+def _m6_search_index(conn):
+    search_index.create_search_index(conn)
+
+# user_version = 적용된 마이그레이션 수. 새 변경은 끝에 추가만 한다.
+MIGRATIONS: List[Callable] = [_m1_base, _m2_guess_columns, _m3_indexes, _m4_rollup, _m5_epoch,
+                              _m6_search_index]
+
+def migrate(conn) -> int:
+    """아직 적용되지 않은 마이그레이션을 한 트랜잭션으로 적용. 적용 후 버전 반환."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for step in MIGRATIONS[version:]:
+            step(conn)
+        if version < len(MIGRATIONS):
+            conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(MIGRATIONS)
+
+# ────────── 프로세스 공용 객체 ──────────
+_db: Optional[ConnectionPool] = None
+_writer: Optional[SubmissionWriter] = None
+_init_lock = threading.Lock()
+
+def get_db() -> ConnectionPool:
+    """연결 풀(첫 호출 때 마이그레이션 1회)."""
+    global _db
+    if _db is None:
+        with _init_lock:
+            if _db is None:
+                pool = get_pool(DB_PATH)
+                with pool.writer() as conn:
+                    migrate(conn)
+                gauge_source("db_pool", pool.stats)
+                _db = pool
+    return _db
+
+def get_writer() -> SubmissionWriter:
+    """제출 INSERT를 묶어서 커밋하는 백그라운드 쓰기 스레드(프로세스당 1개)."""
+    global _writer
+    if _writer is None:
+        db = get_db()
+        with _init_lock:
+            if _writer is None:
+                _writer = SubmissionWriter(db, INSERT_COLS)
+    return _writer
+
+# ────────── 시각 변환 ──────────
+KST_SECONDS = 9 * 3600
+
+def kst_datetimes(epoch: pd.Series) -> pd.Series:
+    """정수 epoch → KST 벽시계 시각(naive). 문자열 파싱 없이 바로 datetime64로."""
+    return pd.to_datetime(pd.to_numeric(epoch) + KST_SECONDS, unit="s")
+
+# ────────── 저장/조회 ──────────
+@timed("db.add_submission")
+def add_submission(row: SubmissionRow) -> Ticket:
+    return get_writer().submit(row)
+
+def submission_filter(start=None, end=None, classes: Optional[Sequence[str]] = None) -> Tuple[str, list]:
+    """날짜(KST, 포함 범위)·학급 필터 → ("WHERE ..." 또는 "", 파라미터). classes=[]이면 아무 행도 없음."""
+    where, params = [], []
+    if start is not None:
+        where.append("kst_date >= ?"); params.append(start.strftime("%Y-%m-%d"))
+    if end is not None:
+        where.append("kst_date <= ?"); params.append(end.strftime("%Y-%m-%d"))
+    if classes is not None:
+        where.append(f"class IN ({','.join('?' * len(classes))})"); params.extend(classes)
+    return ("WHERE " + " AND ".join(where) if where else ""), params
+
+@timed("db.fetch_recent")
+def fetch_recent(limit=1000, start=None, end=None, classes=None) -> pd.DataFrame:
+    """
+    submissions.db에서 최근 레코드를 읽어옵니다.
+    - start/end: 날짜(date) 필터
+    - classes: 학급 리스트 필터
+    - limit: 최신순 최대 N건
+    필터·정렬·LIMIT은 모두 SQL에서 처리(kst_date / ts_epoch 인덱스 사용).
+    """
+    where, params = submission_filter(start, end, classes or None)
+    q = f"""
+        SELECT {", ".join(COLS)}
+        FROM submissions
+        {where}
+        ORDER BY ts_epoch DESC
+        LIMIT ?
+    """
+    with get_db().reader() as conn:
+        df = pd.read_sql_query(q, conn, params=params + [int(limit)])
+
+    if df.empty:
+        return df
+
+    # 정수 epoch → datetime/date (LIMIT 이후 행만)
+    df["dt"] = kst_datetimes(df["ts_epoch"])
+    df["date"] = df["dt"].dt.date
+    return df
+
+@timed("db.data_version")
+def data_version() -> int:
+    """데이터 버전(가장 큰 제출 id). 제출은 추가만 되므로 새 제출이 있을 때만 바뀜 — 캐시 키용, rowid 조회라 즉시."""
+    with get_db().reader() as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM submissions").fetchone()[0]
+
+@timed("db.fetch_daily")
+def fetch_daily(start=None, end=None, classes: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """일별 집계표(날짜 포함 범위·학급 필터)."""
+    with get_db().reader() as conn:
+        return fetch_rollup(conn, start, end, classes)
+
+@timed("db.date_bounds")
+def date_bounds():
+    """제출이 있는 첫날·마지막 날(KST). 없으면 (None, None)."""
+    with get_db().reader() as conn:
+        return rollup_date_bounds(conn)
+
+@timed("db.keyword_counts")
+def keyword_counts(start=None, end=None, classes: Optional[Sequence[str]] = None, n: int = 30) -> pd.Series:
+    """필터에 맞는 제출 답변의 상위 n개 키워드(키워드 → 빈도). 일별 토큰 집계표에서(새 제출은 먼저 더함)."""
+    db = get_db()
+    with db.reader() as conn:
+        behind = search_index.terms_behind(conn)
+    if behind:
+        with db.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")   # 다른 프로세스와 같은 행을 두 번 더하지 않도록 읽기부터 잠금 안에서
+            try:
+                search_index.add_new_terms(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    with db.reader() as conn:
+        return search_index.keyword_counts(conn, start, end, classes, n)
+
+@timed("db.search_submissions")
+def search_submissions(text: str, start=None, end=None, classes: Optional[Sequence[str]] = None,
+                       limit: int = 200) -> pd.DataFrame:
+    """답변에 검색어(접두어, 조사 무시)가 들어간 제출(최신순)."""
+    where, params = submission_filter(start, end, classes)
+    with get_db().reader() as conn:
+        return search_index.search(conn, text, where, params, COLS, limit)
@@ -6,18 +6,28 @@
 # - 제출: SQLite DB에 KST(Asia/Seoul) 타임스탬프로 기록 + guess_* 메타데이터 저장
 # - (교사용) 미니 대시보드: 날짜·학급 필터, 최근 제출 표(합/차/정답여부 한글), 행 선택 상세보기, CSV 저장
 
-import os, base64, time, sqlite3
-from contextlib import closing
+import os, base64, json, queue, time, threading
 from typing import Optional, Tuple
-from pathlib import Path
 from datetime import datetime, date, timedelta
 from zoneinfo import ZoneInfo
 
-import matplotlib
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 import pandas as pd
 import streamlit as st
+import streamlit.components.v1 as components
+
+from blocks3d import COLOR_FLASH, panel_png, sprite_key, warm_sprite_cache
+from arith_steps import Milli, add_steps, sub_steps
+from hint_table import load_table, add_hint, sub_hint
+from storage import DATA_DIR, get_db, add_submission, fetch_recent
+import metrics
+from metrics import timed
+from export import SNAPSHOTS_ENABLED, start_snapshots
+from anim_timeline import (
+    STEP_DELAY_MOVE, BLINK_CYCLES, BLINK_INTERVAL, CARRY_PAUSE_BEFORE, CARRY_PAUSE_AFTER,
+    ALERT_SECONDS, add_timeline, sub_timeline, timeline_html,
+)
+
+RERUN_T0 = time.perf_counter()   # 이번 실행 전체 시간(app.rerun, 맨 아래에서 기록)
 
 # ────────── 세션 기본값 ──────────
 def ensure_defaults():
@@ -35,132 +45,11 @@ def ensure_defaults():
     ss.setdefault("last_correct_answer", None)
 ensure_defaults()
 
-# ────────── DB (Cloud/Local 겸용: /mount/data 우선) ──────────
-import shutil
-from pathlib import Path
-
-def _writable_data_dir() -> Path:
-    # Streamlit Cloud에선 /mount/data 가 쓰기 가능
-    candidates = [Path("/mount/data"), Path.cwd() / ".data"]
-    for p in candidates:
-        try:
-            p.mkdir(parents=True, exist_ok=True)
-            test = p / "_wtest"
-            with open(test, "w") as f:
-                f.write("ok")
-            test.unlink(missing_ok=True)
-            return p
-        except Exception:
-            continue
-    # 마지막 안전장치: 현재 폴더 (가능하면)
-    Path.cwd().mkdir(parents=True, exist_ok=True)
-    return Path.cwd()
-
-DATA_DIR = _writable_data_dir()
-DB_PATH  = str(DATA_DIR / "submissions.db")
-
-# 저장소에 예전 submissions.db(읽기 전용)가 있다면 최초 1회 복사
-REPO_DB = Path(__file__).resolve().parent / "submissions.db"
-if REPO_DB.exists() and not (DATA_DIR / "submissions.db").exists():
-    try:
-        shutil.copy2(REPO_DB, DATA_DIR / "submissions.db")
-    except Exception:
-        pass
-
-@st.cache_resource
-def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    with conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS submissions(
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                class TEXT,
-                nickname TEXT,
-                quest TEXT,
-                rubric_1 INTEGER,
-                rubric_2 INTEGER,
-                rubric_3 INTEGER,
-                rubric_total INTEGER
-            )
-        """)
-        # 안정성 향상
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA synchronous=NORMAL;")
-    return conn
-
-def ensure_guess_columns():
-    conn = get_conn()
-    with conn:
-        for col, ddl in [
-            ("guess_mode",      "TEXT"),
-            ("guess_value",     "TEXT"),
-            ("guess_correct",   "INTEGER"),
-            ("correct_answer",  "TEXT"),
-        ]:
-            try:
-                conn.execute(f"ALTER TABLE submissions ADD COLUMN {col} {ddl}")
-            except Exception:
-                pass
-
-ensure_guess_columns()
-
-def add_submission(row: dict):
-    conn = get_conn()
-    with conn:
-        conn.execute("""
-            INSERT INTO submissions
-            (timestamp, class, nickname, quest, rubric_1, rubric_2, rubric_3, rubric_total,
-             guess_mode, guess_value, guess_correct, correct_answer)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            row.get("timestamp"), row.get("class"), row.get("nickname"), row.get("quest"),
-            row.get("rubric_1"), row.get("rubric_2"), row.get("rubric_3"), row.get("rubric_total"),
-            row.get("guess_mode"), row.get("guess_value"), row.get("guess_correct"), row.get("correct_answer"),
-        ))
-# ────────── 최근 제출 조회 유틸(미니 패널/대시보드 공용) ──────────
-def fetch_recent(limit=1000, start=None, end=None, classes=None) -> pd.DataFrame:
-    """
-    submissions.db에서 최근 레코드를 읽어옵니다.
-    - start/end: 날짜(date) 필터
-    - classes: 학급 리스트 필터
-    - limit: 최신순 최대 N건
-    """
-    conn = get_conn()
-    q = """
-        SELECT
-          id, timestamp, class, nickname, quest,
-          rubric_1, rubric_2, rubric_3, rubric_total,
-          guess_mode, guess_value, guess_correct, correct_answer
-        FROM submissions
-    """
-    df = pd.read_sql_query(q, conn)
-
-    if df.empty:
-        return df
-
-    # 문자열 timestamp → datetime/date
-    df["dt"] = pd.to_datetime(df["timestamp"], errors="coerce")
-    df["date"] = df["dt"].dt.date
-
-    # 필터
-    if start is not None:
-        df = df[df["date"] >= start]
-    if end is not None:
-        df = df[df["date"] <= end]
-    if classes:
-        df = df[df["class"].isin(classes)]
-
-    # 최신순 정렬 + limit
-    return df.sort_values("dt", ascending=False).head(limit).reset_index(drop=True)
+# ────────── DB(storage: /mount/data 우선, 스키마 마이그레이션은 프로세스당 1회) ──────────
+SUBMIT_ACK_SECONDS = 3.0   # 제출 버튼에서 커밋 확인을 기다리는 최대 시간
 
+get_db()
 
-# ────────── 글꼴/스타일 ──────────
-matplotlib.rcParams["font.family"] = [
-    "Noto Sans CJK KR", "NanumGothic", "Apple SD Gothic Neo",
-    "Malgun Gothic", "DejaVu Sans"
-]
-matplotlib.rcParams["font.size"] = 13
 
 st.set_page_config(
     page_title="Decimal Blocks 3D - 소수 셋째 자리까지의 덧셈·뺄셈",
@@ -170,96 +59,33 @@ st.set_page_config(
 st.markdown("<h1 style='margin:0'>Decimal Blocks 3D - 소수 셋째 자리까지의 덧셈·뺄셈</h1>", unsafe_allow_html=True)
 st.markdown("<div style='font-size:16px;color:#334155;margin:6px 0 14px 0'>원하는 두 수를 입력하고 각 탭의 <b>정답 맞혀보기</b> 또는 <b>애니메이션 시작</b> 버튼을 눌러보세요.</div>", unsafe_allow_html=True)
 
-# ────────── 색/타이밍 ──────────
-COLOR_ONES   = (0.20, 0.48, 0.78, 1.0)   # 1 (큐브)
-COLOR_TENTHS = (0.46, 0.68, 0.22, 1.0)   # 0.1 (판)
-COLOR_HUNDS  = (0.98, 0.52, 0.18, 1.0)   # 0.01 (막대)
-COLOR_THOUS  = (0.60, 0.40, 0.80, 1.0)   # 0.001 (작은 큐브)
-COLOR_FLASH  = (1.00, 1.00, 0.10, 1.0)   # 형광노랑
-
-STEP_DELAY_MOVE     = 0.30
-BLINK_CYCLES        = 2
-BLINK_INTERVAL      = 0.60
-CARRY_PAUSE_BEFORE  = 0.70
-CARRY_PAUSE_AFTER   = 0.70
-ALERT_SECONDS       = 4.0
-
-# ────────── 숫자 분해 ──────────
-def split_digits(x: float):
-    s = f"{float(x):.3f}"
-    left, right = s.split(".")
-    o = int(left[-1]) if left else 0
-    t = int(right[0]); h = int(right[1]); k = int(right[2])
-    return o, t, h, k
-
-# ────────── 3D 유틸 ──────────
-def cuboid_vertices(x, y, z, dx, dy, dz):
-    X=[x, x+dx, x+dx, x, x, x+dx, x+dx, x]
-    Y=[y, y, y+dy, y+dy, y, y, y+dy, y+dy]
-    Z=[z, z, z, z, z+dz, z+dz, z+dz, z+dz]
-    return [
-        [(X[0],Y[0],Z[0]),(X[1],Y[1],Z[1]),(X[2],Y[2],Z[2]),(X[3],Y[3],Z[3])],
-        [(X[4],Y[4],Z[4]),(X[5],Y[5],Z[5]),(X[6],Y[6],Z[6]),(X[7],Y[7],Z[7])],
-        [(X[0],Y[0],Z[0]),(X[1],Y[1],Z[1]),(X[5],Y[5],Z[5]),(X[4],Y[4],Z[4])],
-        [(X[2],Y[2],Z[2]),(X[3],Y[3],Z[3]),(X[7],Y[7],Z[7]),(X[6],Y[6],Z[6])],
-        [(X[1],Y[1],Z[1]),(X[2],Y[2],Z[2]),(X[6],Y[6],Z[6]),(X[5],Y[5],Z[5])],
-        [(X[0],Y[0],Z[0]),(X[3],Y[3],Z[3]),(X[7],Y[7],Z[7]),(X[4],Y[4],Z[4])],
-    ]
-
-def add_block(ax, pos, size, color):
-    ax.add_collection3d(Poly3DCollection(
-        cuboid_vertices(*pos, *size),
-        facecolors=[color]*6,
-        edgecolors=(0,0,0,0.35)
-    ))
-
-def scene_axes():
-    fig = plt.figure(figsize=(2.6, 2.6), dpi=160)
-    ax = fig.add_subplot(111, projection='3d')
-    ax.set_facecolor((1,1,1,0)); ax.grid(False)
-    try: ax.set_proj_type('ortho')
-    except: pass
-    try: ax.set_box_aspect((5,3,3))
-    except: pass
-    ax.view_init(elev=18, azim=-45)
-    ax.set_xlim(0,5.2); ax.set_ylim(0,3.2); ax.set_zlim(0,3.2)
-    ax.set_xticks([]); ax.set_yticks([]); ax.set_zticks([])
-    try: ax.set_position([0,0,1,1])
-    except: pass
-    return fig, ax
-
-# ────────── 크기/간격 ──────────
-GAP_MICRO_X = 0.10
-GAP_ROD_X   = 0.10
-GAP_PLATE_Z = 0.10
-
-S = 1.0 + 9*GAP_ROD_X
-PLATE_THICK = max((S - 9*GAP_PLATE_Z)/10.0, 0.001)
-
-SIZE_MICRO = (0.1, 0.1, 0.1)      # 0.001
-SIZE_ROD   = (0.1, S, 0.1)        # 0.01
-SIZE_PLATE = (S, S, PLATE_THICK)  # 0.1
-SIZE_CUBE  = (S, S, S)            # 1
-
-def draw_micros(ax, n, color, gap_x=GAP_MICRO_X):
-    dx, dy, dz = SIZE_MICRO
-    for k in range(n):
-        add_block(ax, (k*(dx + gap_x), 0.0, 0.0), SIZE_MICRO, color)
-
-def draw_rods(ax, n, color, gap_x=GAP_ROD_X):
-    dx, dy, dz = SIZE_ROD
-    for k in range(n):
-        add_block(ax, (k*(dx + gap_x), 0.0, 0.0), SIZE_ROD, color)
-
-def draw_plates(ax, n, color, gap_z=GAP_PLATE_Z):
-    for k in range(n):
-        add_block(ax, (0.0, 0.0, k*(PLATE_THICK + gap_z)), SIZE_PLATE, color)
-
-def draw_cubes(ax, n, color, cols=2, gap=None):
-    if gap is None: gap = 0.35 * S
-    for i in range(n):
-        r, c = divmod(i, cols)
-        add_block(ax, (c*(SIZE_CUBE[0]+gap), r*(SIZE_CUBE[1]+gap), 0), SIZE_CUBE, color)
+# ────────── 힌트 조회 표(모든 수 쌍, 메모리 맵 — 첫 힌트 때 1회 로드) ──────────
+@st.cache_resource
+def get_hint_table():
+    return load_table(DATA_DIR / "hint_table.npy")
+
+# ────────── 스프라이트 캐시 예열(프로세스당 1회, 백그라운드) ──────────
+@st.cache_resource
+def start_sprite_warmup():
+    th = threading.Thread(target=warm_sprite_cache, name="sprite-warmup", daemon=True)
+    th.start()
+    return th
+
+start_sprite_warmup()
+
+# ────────── 제출 스냅숏(BLOCKS_SNAPSHOTS=1일 때만, 프로세스당 1회 — 새 제출이 있을 때만 압축 Parquet) ──────────
+@st.cache_resource
+def start_snapshot_thread():
+    return start_snapshots() if SNAPSHOTS_ENABLED else None
+
+start_snapshot_thread()
+
+# ────────── 계측(BLOCKS_METRICS=1일 때만, 프로세스당 1회 — 데이터 폴더/metrics.prom) ──────────
+@st.cache_resource
+def start_metrics_file():
+    return metrics.start_prometheus_file(DATA_DIR / "metrics.prom") if metrics.ENABLED else None
+
+start_metrics_file()
 
 # ────────── 사운드 ──────────
 def load_bytes(path: str) -> Optional[bytes]:
@@ -275,23 +101,61 @@ def to_tuple(data: Optional[bytes], filename: str) -> Optional[Tuple[bytes,str]]
     mime = "audio/mpeg" if ext == ".mp3" else "audio/wav"
     return (data, mime)
 
-SND_POP   = to_tuple(load_bytes("이동2.mp3"),        "이동2.mp3")             # 이동
-SND_TRANS = to_tuple(load_bytes("변환.mp3"),          "변환.mp3")              # 변환/받아올림/내림
-SND_OK    = to_tuple(load_bytes("정답 레벨업.mp3"),   "정답 레벨업.mp3")       # 완료/정답
-SND_WRONG = to_tuple(load_bytes("다시 생각해보세요.mp3"), "다시 생각해보세요.mp3") # 오답
+SOUND_FILES = {
+    "pop":   "이동2.mp3",               # 이동
+    "trans": "변환.mp3",                # 변환/받아올림/내림
+    "ok":    "정답 레벨업.mp3",          # 완료/정답
+    "wrong": "다시 생각해보세요.mp3",     # 오답
+}
+SND_POP, SND_TRANS, SND_OK, SND_WRONG = "pop", "trans", "ok", "wrong"
 
-def play_sound(t: Optional[Tuple[bytes,str]]):
-    if not t: return
-    data, mime = t
-    b64 = base64.b64encode(data).decode()
-    uid = str(time.time()).replace('.','')
-    st.markdown(
-        f"""<audio id="aud{uid}" autoplay style="display:none">
-               <source src="data:{mime};base64,{b64}">
-           </audio>""",
-        unsafe_allow_html=True
+@st.cache_resource
+def sound_data_uris() -> dict:
+    # 효과음 파일은 프로세스당 한 번만 읽고 base64로 인코딩
+    uris = {}
+    for name, filename in SOUND_FILES.items():
+        t = to_tuple(load_bytes(filename), filename)
+        if t:
+            data, mime = t
+            uris[name] = f"data:{mime};base64,{base64.b64encode(data).decode()}"
+    return uris
+
+def ensure_sound_registry():
+    # 브라우저 세션당 한 번: 부모 문서에 <audio id="dbl-snd-…">를 심어 둔다(이후에는 id만 전송)
+    if st.session_state.get("sound_registered"):
+        return
+    js = f"""<script>
+    const doc = window.parent.document;
+    for (const [id, src] of Object.entries({json.dumps(sound_data_uris())})) {{
+      if (doc.getElementById('dbl-snd-' + id)) continue;
+      const a = doc.createElement('audio');
+      a.id = 'dbl-snd-' + id; a.src = src; a.preload = 'auto'; a.style.display = 'none';
+      doc.body.appendChild(a);
+    }}
+    </script>"""
+    components.html(js, height=0)
+    st.session_state["sound_registered"] = True
+
+@timed("app.sound")
+def play_sound(name: Optional[str]):
+    if not name or name not in sound_data_uris(): return
+    uid = str(time.time()).replace('.','')   # 같은 소리를 연달아 재생해도 새 요소로 인식되도록
+    components.html(
+        f"""<script>/*{uid}*/
+        const a = window.parent.document.getElementById('dbl-snd-{name}');
+        if (a) {{ a.cloneNode().play().catch(() => {{}}); }}
+        </script>""",
+        height=0
     )
 
+ensure_sound_registry()
+
+def play_timeline(board_ph, tl, titles):
+    # 서버는 타임라인만 계산해 한 번 보내고, 재생(대기/깜빡임/소리)은 브라우저가 맡는다
+    with board_ph:
+        # 효과음은 ensure_sound_registry()가 부모 문서에 심어 둔 것을 쓰므로 보내지 않는다
+        components.html(timeline_html(tl, {}, titles), height=760, scrolling=True)
+
 # ────────── 사이드바 ──────────
 with st.sidebar:
     st.markdown("### 역할 선택 / 문제 설정 / 소리")
@@ -322,6 +186,8 @@ with st.sidebar:
     if st.button("🔊 소리 켜기"):
         play_sound(SND_OK)
         st.success("소리 사용이 허용되었습니다.")
+    st.toggle("브라우저에서 애니메이션 재생", value=False, key="client_anim",
+              help="애니메이션 전체를 한 번에 보내 브라우저에서 재생합니다(서버 대기 없음).")
 
 if st.session_state.get("teacher_ok", False):
     st.markdown(
@@ -356,101 +222,135 @@ def show_alert(text: str, seconds: float = ALERT_SECONDS):
     ALERT.empty()
 
 # ────────── 깜빡임(덧셈/뺄셈 변환) ──────────
+def blink(ph, count, kind, interval=BLINK_INTERVAL):
+    for _ in range(BLINK_CYCLES):
+        render_panel(ph, count, kind, color=COLOR_FLASH); time.sleep(interval)
+        render_panel(ph, count, kind);                    time.sleep(interval)
+
 def flash_micros_as_rod(ph):
     time.sleep(CARRY_PAUSE_BEFORE)
-    for _ in range(BLINK_CYCLES):
-        fig, ax = scene_axes(); draw_micros(ax, 10, COLOR_FLASH); ph.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-        fig, ax = scene_axes(); draw_micros(ax, 10, COLOR_THOUS); ph.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
+    blink(ph, 10, "K")
     time.sleep(CARRY_PAUSE_AFTER); play_sound(SND_TRANS)
 
 def flash_rods_as_plate(ph):
     time.sleep(CARRY_PAUSE_BEFORE)
-    for _ in range(BLINK_CYCLES):
-        fig, ax = scene_axes(); draw_rods(ax, 10, COLOR_FLASH); ph.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-        fig, ax = scene_axes(); draw_rods(ax, 10, COLOR_HUNDS ); ph.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
+    blink(ph, 10, "H")
     time.sleep(CARRY_PAUSE_AFTER); play_sound(SND_TRANS)
 
 def flash_plates_as_cube(ph_T, ph_O, o_now):
     time.sleep(CARRY_PAUSE_BEFORE)
+    blink(ph_T, 10, "T")
     for _ in range(BLINK_CYCLES):
-        fig, ax = scene_axes(); draw_plates(ax, 10, COLOR_FLASH); ph_T.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-        fig, ax = scene_axes(); draw_plates(ax, 10, COLOR_TENTHS); ph_T.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-    for _ in range(BLINK_CYCLES):
-        fig, ax = scene_axes(); draw_cubes(ax, o_now+1, COLOR_FLASH); ph_O.pyplot(fig, True); plt.close(fig); time.sleep(0.25)
-        fig, ax = scene_axes(); draw_cubes(ax, o_now,   COLOR_ONES ); ph_O.pyplot(fig, True); plt.close(fig); time.sleep(0.25)
+        render_panel(ph_O, o_now+1, "O", color=COLOR_FLASH); time.sleep(0.25)
+        render_panel(ph_O, o_now,   "O");                    time.sleep(0.25)
     time.sleep(CARRY_PAUSE_AFTER); play_sound(SND_TRANS)
 
 def flash_one_rod_to_ten_micros(ph_source_H, ph_dest_K):
     time.sleep(CARRY_PAUSE_BEFORE)
-    for _ in range(BLINK_CYCLES):
-        fig, ax = scene_axes(); draw_rods(ax, 1, COLOR_FLASH); ph_source_H.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-        fig, ax = scene_axes(); draw_rods(ax, 1, COLOR_HUNDS ); ph_source_H.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-    for _ in range(BLINK_CYCLES):
-        fig, ax = scene_axes(); draw_micros(ax, 10, COLOR_FLASH); ph_dest_K.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-        fig, ax = scene_axes(); draw_micros(ax, 10, COLOR_THOUS); ph_dest_K.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
+    blink(ph_source_H, 1, "H")
+    blink(ph_dest_K, 10, "K")
     time.sleep(CARRY_PAUSE_AFTER); play_sound(SND_TRANS)
 
 def flash_one_plate_to_ten_rods(ph_source_T, ph_dest_H):
     time.sleep(CARRY_PAUSE_BEFORE)
-    for _ in range(BLINK_CYCLES):
-        fig, ax = scene_axes(); draw_plates(ax, 1, COLOR_FLASH); ph_source_T.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-        fig, ax = scene_axes(); draw_plates(ax, 1, COLOR_TENTHS); ph_source_T.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-    for _ in range(BLINK_CYCLES):
-        fig, ax = scene_axes(); draw_rods(ax, 10, COLOR_FLASH); ph_dest_H.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-        fig, ax = scene_axes(); draw_rods(ax, 10, COLOR_HUNDS ); ph_dest_H.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
+    blink(ph_source_T, 1, "T")
+    blink(ph_dest_H, 10, "H")
     time.sleep(CARRY_PAUSE_AFTER); play_sound(SND_TRANS)
 
 def flash_one_cube_to_ten_plates(ph_source_O, ph_dest_T, t_now):
     time.sleep(CARRY_PAUSE_BEFORE)
-    for _ in range(BLINK_CYCLES):
-        fig, ax = scene_axes(); draw_cubes(ax, 1, COLOR_FLASH); ph_source_O.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-        fig, ax = scene_axes(); draw_cubes(ax, 1, COLOR_ONES ); ph_source_O.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-    for _ in range(BLINK_CYCLES):
-        fig, ax = scene_axes(); draw_plates(ax, 10, COLOR_FLASH); ph_dest_T.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
-        fig, ax = scene_axes(); draw_plates(ax, 10, COLOR_TENTHS); ph_dest_T.pyplot(fig, True); plt.close(fig); time.sleep(BLINK_INTERVAL)
+    blink(ph_source_O, 1, "O")
+    blink(ph_dest_T, 10, "T")
     time.sleep(CARRY_PAUSE_AFTER); play_sound(SND_TRANS)
 
+def flash_carry(p, R_ph, o_now):
+    if p == "k":   flash_micros_as_rod(R_ph["k"])
+    elif p == "h": flash_rods_as_plate(R_ph["h"])
+    else:          flash_plates_as_cube(R_ph["t"], R_ph["o"], o_now)
+
+def flash_borrow(src, dst, R_ph, t_now):
+    if src == "h":   flash_one_rod_to_ten_micros(R_ph["h"], R_ph["k"])
+    elif src == "t": flash_one_plate_to_ten_rods(R_ph["t"], R_ph["h"])
+    else:            flash_one_cube_to_ten_plates(R_ph["o"], R_ph["t"], t_now)
+
+# ────────── 단계 재생(서버) ──────────
+def play_steps(steps, rows, render_all, R_ph):
+    """arith_steps 단계 목록을 화면에 재생. rows=(A, B, R) 자리별 dict, R_ph=결과판 placeholder."""
+    for stp in steps:
+        if stp.kind == "alert":
+            show_alert(stp.text); continue
+        # 변환 깜빡임은 바뀌기 전 상태(10개/1개)를 보여준 뒤 반영
+        if stp.kind == "carry":
+            flash_carry(stp.src, R_ph, rows[2]["o"])
+        elif stp.kind == "borrow":
+            flash_borrow(stp.src, stp.dst, R_ph, rows[2]["t"])
+        for row, digits in zip(rows, stp.after):
+            row.update(zip(("o", "t", "h", "k"), digits))
+        if stp.kind == "move":
+            render_all(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
+        elif stp.kind == "carry":
+            render_all(label=stp.dst.upper()); time.sleep(STEP_DELAY_MOVE)
+        elif stp.kind == "borrow":
+            render_all(label=stp.src.upper()); time.sleep(STEP_DELAY_MOVE)
+        elif stp.kind == "collect":
+            render_all()
+        elif stp.kind == "done":
+            render_all(); play_sound(SND_OK)
+
 # ────────── 공용 UI ──────────
+DIGIT_HTML = "<div style='text-align:center;font-size:44px;font-weight:1000;line-height:1;'>{}</div>"
+
+# 이번 실행에서 placeholder별로 마지막으로 그린 상태. 같은 상태면 다시 보내지 않는다.
+# (ph 객체도 함께 보관해 id 재사용으로 상태가 섞이지 않게 함)
+_drawn = {}
+
+def changed(ph, state) -> bool:
+    prev = _drawn.get(id(ph))
+    if prev is not None and prev[1] == state:
+        return False
+    _drawn[id(ph)] = (ph, state)
+    return True
+
+def set_digit(ph, val):
+    if changed(ph, ("digit", val)):
+        ph.markdown(DIGIT_HTML.format(val), unsafe_allow_html=True)
+
 def number_row(parent_col, o, t, h, k, title):
     parent_col.markdown(f"<div style='text-align:center;font-size:20px;font-weight:900;margin-bottom:4px;'>{title}</div>", unsafe_allow_html=True)
     c1, cdot, c2, c3, c4 = parent_col.columns([1, 0.10, 1, 1, 1], gap="small")
     o_ph = c1.empty(); t_ph = c2.empty(); h_ph = c3.empty(); k_ph = c4.empty()
-    cdot.markdown("<div style='text-align:center;font-size:44px;font-weight:1000;line-height:1;'>·</div>", unsafe_allow_html=True)
-    for ph, val in [(o_ph,o),(t_ph,t),(h_ph,h),(k_ph,k)]:
-        ph.markdown(f"<div style='text-align:center;font-size:44px;font-weight:1000;line-height:1;'>{val}</div>", unsafe_allow_html=True)
+    cdot.markdown(DIGIT_HTML.format("·"), unsafe_allow_html=True)
+    set_numbers((o_ph, t_ph, h_ph, k_ph), o, t, h, k)
     p1, _, p2, p3, p4 = parent_col.columns([1, 0.10, 1, 1, 1], gap="small")
     return (o_ph, t_ph, h_ph, k_ph), (p1.empty(), p2.empty(), p3.empty(), p4.empty())
 
 def set_numbers(ph_tuple, o, t, h, k):
-    o_ph, t_ph, h_ph, k_ph = ph_tuple
-    for ph, val in [(o_ph,o),(t_ph,t),(h_ph,h),(k_ph,k)]:
-        ph.markdown(f"<div style='text-align:center;font-size:44px;font-weight:1000;line-height:1;'>{val}</div>", unsafe_allow_html=True)
-
-def render_panel(ph, count, kind: str, label=None):
-    fig, ax = scene_axes()
-    if kind == "O":
-        draw_cubes(ax, count, COLOR_ONES)
-        if label == "O": ax.text(0.0, 0.0, 2.45, "0.1×10→1", color="#0F766E", fontsize=14, weight="bold")
-    elif kind == "T":
-        draw_plates(ax, count, COLOR_TENTHS)
-        if label == "T": ax.text(0.0, 0.0, 2.45, "0.01×10→0.1", color="#0F766E", fontsize=14, weight="bold")
-    elif kind == "H":
-        draw_rods(ax, count, COLOR_HUNDS)
-        if label == "H": ax.text(0.0, 0.0, 2.45, "0.001×10→0.01", color="#0F766E", fontsize=14, weight="bold")
-    else:  # K
-        draw_micros(ax, count, COLOR_THOUS)
-    ph.pyplot(fig, True); plt.close(fig)
+    for ph, val in zip(ph_tuple, (o, t, h, k)):
+        set_digit(ph, val)
+
+def render_panel(ph, count, kind: str, label=None, color=None):
+    # 미리 그려 둔 스프라이트(PNG)를 그대로 전송 — matplotlib 3D 래스터화는 프로세스당 1회
+    # 직전에 그린 (kind, count, color, label)과 같으면 아무것도 보내지 않는다.
+    if changed(ph, sprite_key(kind, count, color, label)):
+        with timed("app.panel"):
+            ph.image(panel_png(kind, count, color=color, label=label), use_container_width=True)
 
 # ────────── 덧셈/뺄셈 탭 ──────────
 tab_add, tab_sub = st.tabs(["➕ 덧셈", "➖ 뺄셈"])
 
+# 입력한 두 수는 천분의 일 단위 정수로 한 번만 바꿔 두고(문자열 변환 없음) 계속 사용
+A_m = Milli.from_float(st.session_state["A"])
+B_m = Milli.from_float(st.session_state["B"])
+
 # ===== 덧셈 =====
 with tab_add:
-    row_top = st.columns(2, gap="large")
-    row_bot = st.columns(1)
+    board_add = st.empty()
+    board = board_add.container()
+    row_top = board.columns(2, gap="large")
+    row_bot = board.columns(1)
 
-    A_o0, A_t0, A_h0, A_k0 = split_digits(st.session_state["A"])
-    B_o0, B_t0, B_h0, B_k0 = split_digits(st.session_state["B"])
+    A_o0, A_t0, A_h0, A_k0 = A_m.digits()
+    B_o0, B_t0, B_h0, B_k0 = B_m.digits()
 
     A_nums, (F_O, F_T, F_H, F_K) = number_row(row_top[0], A_o0, A_t0, A_h0, A_k0, "첫번째 수")
     B_nums, (S_O, S_T, S_H, S_K) = number_row(row_top[1], B_o0, B_t0, B_h0, B_k0, "두번째 수")
@@ -459,19 +359,19 @@ with tab_add:
     result.markdown("<div style='text-align:center;font-size:20px;font-weight:900;margin-bottom:4px;'>결과</div>", unsafe_allow_html=True)
     r_num = result.columns([1,0.10,1,1,1], gap="small")
     R_o_num, R_dot, R_t_num, R_h_num, R_k_num = r_num[0].empty(), r_num[1], r_num[2].empty(), r_num[3].empty(), r_num[4].empty()
-    R_dot.markdown("<div style='text-align:center;font-size:44px;font-weight:1000;line-height:1;'>·</div>", unsafe_allow_html=True)
+    R_dot.markdown(DIGIT_HTML.format("·"), unsafe_allow_html=True)
     r_pan = result.columns([1,0.10,1,1,1], gap="small")
     R_O, R_T, R_H, R_K = r_pan[0].empty(), r_pan[2].empty(), r_pan[3].empty(), r_pan[4].empty()
 
     def update_result_numbers_add(o, t, h, k):
-        for ph, val in [(R_o_num,o),(R_t_num,t),(R_h_num,h),(R_k_num,k)]:
-            ph.markdown(f"<div style='text-align:center;font-size:44px;font-weight:1000;line-height:1;'>{val}</div>", unsafe_allow_html=True)
+        set_numbers((R_o_num, R_t_num, R_h_num, R_k_num), o, t, h, k)
 
     add_A = {"o":A_o0, "t":A_t0, "h":A_h0, "k":A_k0}
     add_B = {"o":B_o0, "t":B_t0, "h":B_h0, "k":B_k0}
     add_R = {"o":0,    "t":0,    "h":0,    "k":0}
 
     def render_all_add(label=None):
+        # 전체 상태를 넘기되, 실제 전송은 직전과 달라진 placeholder만(changed 참고)
         set_numbers(A_nums, add_A["o"], add_A["t"], add_A["h"], add_A["k"])
         set_numbers(B_nums, add_B["o"], add_B["t"], add_B["h"], add_B["k"])
         update_result_numbers_add(add_R["o"], add_R["t"], add_R["h"], add_R["k"])
@@ -494,8 +394,8 @@ with tab_add:
     with colg2:
         if st.button("정답 확인(덧셈)", key="check_add"):
             try:
-                correct_add = round(float(st.session_state["A"]) + float(st.session_state["B"]), 3)
-                guess_val = round(float(user_guess_add), 3)
+                correct_add = A_m + B_m
+                guess_val = Milli.parse(user_guess_add)
                 if guess_val == correct_add:
                     st.success("정답이에요! 🎉")
                     st.balloons(); play_sound(SND_OK)
@@ -503,21 +403,18 @@ with tab_add:
                     st.toast(f"레벨 {st.session_state['level']} 달성!", icon="🎈")
                     st.session_state["wrong_streak_add"] = 0
                     st.session_state["last_guess_mode"] = "add"
-                    st.session_state["last_guess_value"] = f"{guess_val:.3f}"
+                    st.session_state["last_guess_value"] = str(guess_val)
                     st.session_state["last_guess_correct"] = 1
-                    st.session_state["last_correct_answer"] = f"{correct_add:.3f}"
+                    st.session_state["last_correct_answer"] = str(correct_add)
                 else:
                     play_sound(SND_WRONG)
                     st.error("아쉬워요! ❌")
                     ws = st.session_state.get("wrong_streak_add", 0) + 1
                     st.session_state["wrong_streak_add"] = ws
-                    A_o,A_t,A_h,A_k = split_digits(st.session_state["A"])
-                    B_o,B_t,B_h,B_k = split_digits(st.session_state["B"])
+                    a_d, b_d = A_m.digits(), B_m.digits()
                     hints = []
-                    # 1단계: 받아올림 발생 자리
-                    carry_k = 1 if (A_k+B_k)>=10 else 0
-                    carry_h = 1 if (A_h+B_h+carry_k)>=10 else 0
-                    carry_t = 1 if (A_t+B_t+carry_h)>=10 else 0
+                    # 1단계: 받아올림 발생 자리 (2단계 부분합도 함께 조회)
+                    carry_k, carry_h, carry_t, k_sum, h_sum, t_sum = add_hint(get_hint_table(), a_d, b_d)
                     if ws >= 1:
                         step1 = []
                         if carry_k: step1.append("소수 셋째 자리에서 받아올림이 생겨요.")
@@ -526,78 +423,37 @@ with tab_add:
                         if step1: hints.append("<br>".join(step1))
                     # 2단계: 자리별 부분합 수치
                     if ws >= 2:
-                        k_sum = A_k + B_k
-                        h_sum = A_h + B_h + (1 if k_sum>=10 else 0)
-                        t_sum = A_t + B_t + (1 if h_sum>=10 else 0)
                         hints.append(f"부분합 힌트: 0.001자리={k_sum}, 0.01자리={h_sum}, 0.1자리={t_sum}")
                     # 3단계: 형식 힌트
                     if ws >= 3:
                         hints.append("정답 형식 힌트: 합은 소수 셋째 자리까지 표기(예: a.bcdef → a.bcd).")
                     show_alert("<br>".join(hints) if hints else "자릿값을 다시 생각해 보세요!", seconds=3.5)
                     st.session_state["last_guess_mode"] = "add"
-                    st.session_state["last_guess_value"] = f"{guess_val:.3f}"
+                    st.session_state["last_guess_value"] = str(guess_val)
                     st.session_state["last_guess_correct"] = 0
-                    st.session_state["last_correct_answer"] = f"{correct_add:.3f}"
+                    st.session_state["last_correct_answer"] = str(correct_add)
             except Exception:
                 st.warning("숫자 형식으로 입력해 주세요. 예: 2.035")
 
     # --- (덧셈) 애니메이션 버튼 ---
-    if st.button("▶ (덧셈) 애니메이션 시작", use_container_width=True, key="run_add"):
-        # 결과판으로 하나씩 이동
-        # 0.001
-        for _ in range(add_A["k"]):
-            add_A["k"] -= 1; add_R["k"] += 1; render_all_add(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-            if add_R["k"] == 10:
-                show_alert("0.001이 10개 모여 0.01이 됐어요.<br><b>소수 둘째 자리로 1 받아올림할게요.</b>")
-                flash_micros_as_rod(R_K)
-                add_R["k"] = 0; add_R["h"] += 1; render_all_add(label="H"); time.sleep(STEP_DELAY_MOVE)
-        for _ in range(add_B["k"]):
-            add_B["k"] -= 1; add_R["k"] += 1; render_all_add(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-            if add_R["k"] == 10:
-                show_alert("0.001이 10개 모여 0.01이 됐어요.<br><b>소수 둘째 자리로 1 받아올림할게요.</b>")
-                flash_micros_as_rod(R_K)
-                add_R["k"] = 0; add_R["h"] += 1; render_all_add(label="H"); time.sleep(STEP_DELAY_MOVE)
-        # 0.01
-        for _ in range(add_A["h"]):
-            add_A["h"] -= 1; add_R["h"] += 1; render_all_add(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-            if add_R["h"] == 10:
-                show_alert("0.01이 10개 모여 0.1이 됐어요.<br><b>소수 첫째 자리로 1 받아올림할게요.</b>")
-                flash_rods_as_plate(R_H)
-                add_R["h"] = 0; add_R["t"] += 1; render_all_add(label="T"); time.sleep(STEP_DELAY_MOVE)
-        for _ in range(add_B["h"]):
-            add_B["h"] -= 1; add_R["h"] += 1; render_all_add(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-            if add_R["h"] == 10:
-                show_alert("0.01이 10개 모여 0.1이 됐어요.<br><b>소수 첫째 자리로 1 받아올림할게요.</b>")
-                flash_rods_as_plate(R_H)
-                add_R["h"] = 0; add_R["t"] += 1; render_all_add(label="T"); time.sleep(STEP_DELAY_MOVE)
-        # 0.1
-        for _ in range(add_A["t"]):
-            add_A["t"] -= 1; add_R["t"] += 1; render_all_add(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-            if add_R["t"] == 10:
-                show_alert("0.1이 10개 모여 1이 됐어요.<br><b>일의 자리로 1 받아올림할게요.</b>")
-                flash_plates_as_cube(R_T, R_O, add_R["o"])
-                add_R["t"] = 0; add_R["o"] += 1; render_all_add(label="O"); time.sleep(STEP_DELAY_MOVE)
-        for _ in range(add_B["t"]):
-            add_B["t"] -= 1; add_R["t"] += 1; render_all_add(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-            if add_R["t"] == 10:
-                show_alert("0.1이 10개 모여 1이 됐어요.<br><b>일의 자리로 1 받아올림할게요.</b>")
-                flash_plates_as_cube(R_T, R_O, add_R["o"])
-                add_R["t"] = 0; add_R["o"] += 1; render_all_add(label="O"); time.sleep(STEP_DELAY_MOVE)
-        # 1
-        for _ in range(add_A["o"]):
-            add_A["o"] -= 1; add_R["o"] += 1; render_all_add(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-        for _ in range(add_B["o"]):
-            add_B["o"] -= 1; add_R["o"] += 1; render_all_add(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-
-        render_all_add(); play_sound(SND_OK)
+    run_add = st.button("▶ (덧셈) 애니메이션 시작", use_container_width=True, key="run_add")
+    if run_add and st.session_state.get("client_anim"):
+        play_timeline(board_add, add_timeline((A_o0, A_t0, A_h0, A_k0), (B_o0, B_t0, B_h0, B_k0)),
+                      ("첫번째 수", "두번째 수"))
+    elif run_add:
+        # 결과판으로 하나씩 이동(낮은 자리부터, 10개가 되면 받아올림)
+        play_steps(add_steps((A_o0, A_t0, A_h0, A_k0), (B_o0, B_t0, B_h0, B_k0)),
+                   (add_A, add_B, add_R), render_all_add, {"o": R_O, "t": R_T, "h": R_H, "k": R_K})
 
 # ===== 뺄셈 =====
 with tab_sub:
-    row_top = st.columns(2, gap="large")
-    row_bot = st.columns(1)
+    board_sub = st.empty()
+    board = board_sub.container()
+    row_top = board.columns(2, gap="large")
+    row_bot = board.columns(1)
 
-    A0_o, A0_t, A0_h, A0_k = split_digits(st.session_state["A"])
-    B0_o, B0_t, B0_h, B0_k = split_digits(st.session_state["B"])
+    A0_o, A0_t, A0_h, A0_k = A_m.digits()
+    B0_o, B0_t, B0_h, B0_k = B_m.digits()
 
     sub_A = {"o":A0_o, "t":A0_t, "h":A0_h, "k":A0_k}  # 원래 수(표시)
     sub_B = {"o":B0_o, "t":B0_t, "h":B0_h, "k":B0_k}  # 덜어내는 수(표시)
@@ -610,15 +466,15 @@ with tab_sub:
     result_area.markdown("<div style='text-align:center;font-size:20px;font-weight:900;margin-bottom:4px;'>결과</div>", unsafe_allow_html=True)
     r_num_cols = result_area.columns([1,0.10,1,1,1], gap="small")
     R_o_num, R_dot, R_t_num, R_h_num, R_k_num = r_num_cols[0].empty(), r_num_cols[1], r_num_cols[2].empty(), r_num_cols[3].empty(), r_num_cols[4].empty()
-    R_dot.markdown("<div style='text-align:center;font-size:44px;font-weight:1000;line-height:1;'>·</div>", unsafe_allow_html=True)
+    R_dot.markdown(DIGIT_HTML.format("·"), unsafe_allow_html=True)
     r_pan_cols = result_area.columns([1,0.10,1,1,1], gap="small")
     R_O, R_T, R_H, R_K = r_pan_cols[0].empty(), r_pan_cols[2].empty(), r_pan_cols[3].empty(), r_pan_cols[4].empty()
 
     def update_result_numbers_sub(o, t, h, k):
-        for ph, val in [(R_o_num,o),(R_t_num,t),(R_h_num,h),(R_k_num,k)]:
-            ph.markdown(f"<div style='text-align:center;font-size:44px;font-weight:1000;line-height:1;'>{val}</div>", unsafe_allow_html=True)
+        set_numbers((R_o_num, R_t_num, R_h_num, R_k_num), o, t, h, k)
 
     def render_all_sub(label=None):
+        # 전체 상태를 넘기되, 실제 전송은 직전과 달라진 placeholder만(changed 참고)
         set_numbers(A_nums, sub_A["o"], sub_A["t"], sub_A["h"], sub_A["k"])
         set_numbers(B_nums, sub_B["o"], sub_B["t"], sub_B["h"], sub_B["k"])
         update_result_numbers_sub(res["o"], res["t"], res["h"], res["k"])
@@ -633,49 +489,6 @@ with tab_sub:
 
     render_all_sub()
 
-    # 받아내림 헬퍼
-    def borrow_for_k(need):
-        if res["k"] >= need: return
-        show_alert(f"{res['k']}에서 {need}을 뺄 수 없어요!<br><b>0.01 하나를 0.001 10개로 받아내림할게요.</b>")
-        if res["h"] > 0:
-            flash_one_rod_to_ten_micros(R_H, R_K)
-            res["h"] -= 1; res["k"] += 10
-            render_all_sub(label="H"); time.sleep(STEP_DELAY_MOVE); return
-        if res["t"] > 0:
-            show_alert("0.1 하나를 0.01 10개로 바꿔 먼저 내려올게요.")
-            flash_one_plate_to_ten_rods(R_T, R_H)
-            res["t"] -= 1; res["h"] += 10
-            render_all_sub(label="T"); time.sleep(STEP_DELAY_MOVE)
-            borrow_for_k(need); return
-        if res["o"] > 0:
-            show_alert("1 하나를 0.1 10개로 바꿔 먼저 내려올게요.")
-            flash_one_cube_to_ten_plates(R_O, R_T, res["t"])
-            res["o"] -= 1; res["t"] += 10
-            render_all_sub(label="O"); time.sleep(STEP_DELAY_MOVE)
-            borrow_for_k(need); return
-
-    def borrow_for_h(need):
-        if res["h"] >= need: return
-        show_alert(f"{res['h']}에서 {need}을 뺄 수 없어요!<br><b>0.1 하나를 0.01 10개로 받아내림할게요.</b>")
-        if res["t"] > 0:
-            flash_one_plate_to_ten_rods(R_T, R_H)
-            res["t"] -= 1; res["h"] += 10
-            render_all_sub(label="T"); time.sleep(STEP_DELAY_MOVE); return
-        if res["o"] > 0:
-            show_alert("1 하나를 0.1 10개로 바꿔 먼저 내려올게요.")
-            flash_one_cube_to_ten_plates(R_O, R_T, res["t"])
-            res["o"] -= 1; res["t"] += 10
-            render_all_sub(label="O"); time.sleep(STEP_DELAY_MOVE)
-            borrow_for_h(need); return
-
-    def borrow_for_t(need):
-        if res["t"] >= need: return
-        show_alert(f"{res['t']}에서 {need}을 뺄 수 없어요!<br><b>1 하나를 0.1 10개로 받아내림할게요.</b>")
-        if res["o"] > 0:
-            flash_one_cube_to_ten_plates(R_O, R_T, res["t"])
-            res["o"] -= 1; res["t"] += 10
-            render_all_sub(label="O"); time.sleep(STEP_DELAY_MOVE); return
-
     # --- 정답 맞혀보기 (뺄셈) ---
     st.markdown("#### 🧠 정답 맞혀보기 (뺄셈)")
     colg1s, colg2s = st.columns([2,1])
@@ -684,8 +497,8 @@ with tab_sub:
     with colg2s:
         if st.button("정답 확인(뺄셈)", key="check_sub"):
             try:
-                correct_sub = round(float(st.session_state["A"]) - float(st.session_state["B"]), 3)
-                guess_val = round(float(user_guess_sub), 3)
+                correct_sub = A_m - B_m
+                guess_val = Milli.parse(user_guess_sub)
                 if guess_val == correct_sub:
                     st.success("정답이에요! 🎉")
                     st.balloons(); play_sound(SND_OK)
@@ -693,20 +506,18 @@ with tab_sub:
                     st.toast(f"레벨 {st.session_state['level']} 달성!", icon="🎈")
                     st.session_state["wrong_streak_sub"] = 0
                     st.session_state["last_guess_mode"] = "sub"
-                    st.session_state["last_guess_value"] = f"{guess_val:.3f}"
+                    st.session_state["last_guess_value"] = str(guess_val)
                     st.session_state["last_guess_correct"] = 1
-                    st.session_state["last_correct_answer"] = f"{correct_sub:.3f}"
+                    st.session_state["last_correct_answer"] = str(correct_sub)
                 else:
                     play_sound(SND_WRONG)
                     st.error("아쉬워요! ❌")
                     ws = st.session_state.get("wrong_streak_sub", 0) + 1
                     st.session_state["wrong_streak_sub"] = ws
-                    A_o,A_t,A_h,A_k = split_digits(st.session_state["A"])
-                    B_o,B_t,B_h,B_k = split_digits(st.session_state["B"])
+                    A_o,A_t,A_h,A_k = a_d = A_m.digits()
+                    B_o,B_t,B_h,B_k = b_d = B_m.digits()
                     hints = []
-                    need_k = A_k < B_k
-                    need_h = (A_h - (1 if need_k else 0)) < B_h
-                    need_t = (A_t - (1 if (need_h or (A_h==B_h and need_k)) else 0)) < B_t
+                    need_k, need_h, need_t = sub_hint(get_hint_table(), a_d, b_d)
                     if ws >= 1:
                         step1 = []
                         if need_k: step1.append("소수 셋째 자리에서 받아내림이 필요해요.")
@@ -719,45 +530,21 @@ with tab_sub:
                         hints.append("정답 형식 힌트: 차는 소수 셋째 자리까지 표기(예: 0.abc). 받아내림이 있으면 앞자리에서 1을 빌려와요.")
                     show_alert("<br>".join(hints) if hints else "자릿값을 다시 생각해 보세요!", seconds=3.5)
                     st.session_state["last_guess_mode"] = "sub"
-                    st.session_state["last_guess_value"] = f"{guess_val:.3f}"
+                    st.session_state["last_guess_value"] = str(guess_val)
                     st.session_state["last_guess_correct"] = 0
-                    st.session_state["last_correct_answer"] = f"{correct_sub:.3f}"
+                    st.session_state["last_correct_answer"] = str(correct_sub)
             except Exception:
                 st.warning("숫자 형식으로 입력해 주세요. 예: 0.479")
 
     # --- (뺄셈) 애니메이션: A를 결과로 즉시 옮긴 후 차감 시작 ---
-    if st.button("▶ (뺄셈) 애니메이션 시작", use_container_width=True, key="run_sub"):
-        res["k"] += sub_A["k"]; sub_A["k"] = 0
-        res["h"] += sub_A["h"]; sub_A["h"] = 0
-        res["t"] += sub_A["t"]; sub_A["t"] = 0
-        res["o"] += sub_A["o"]; sub_A["o"] = 0
-        render_all_sub()
-
-        if sub_B["k"] > 0:
-            need = sub_B["k"]
-            if res["k"] < need: borrow_for_k(need)
-            for _ in range(need):
-                res["k"] -= 1; sub_B["k"] -= 1
-                render_all_sub(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-        if sub_B["h"] > 0:
-            need = sub_B["h"]
-            if res["h"] < need: borrow_for_h(need)
-            for _ in range(need):
-                res["h"] -= 1; sub_B["h"] -= 1
-                render_all_sub(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-        if sub_B["t"] > 0:
-            need = sub_B["t"]
-            if res["t"] < need: borrow_for_t(need)
-            for _ in range(need):
-                res["t"] -= 1; sub_B["t"] -= 1
-                render_all_sub(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-        if sub_B["o"] > 0:
-            need = sub_B["o"]
-            for _ in range(need):
-                res["o"] -= 1; sub_B["o"] -= 1
-                render_all_sub(); play_sound(SND_POP); time.sleep(STEP_DELAY_MOVE)
-
-        render_all_sub(); play_sound(SND_OK)
+    run_sub = st.button("▶ (뺄셈) 애니메이션 시작", use_container_width=True, key="run_sub")
+    if run_sub and st.session_state.get("client_anim"):
+        play_timeline(board_sub, sub_timeline((A0_o, A0_t, A0_h, A0_k), (B0_o, B0_t, B0_h, B0_k)),
+                      ("첫번째 수(원래 수)", "두번째 수(덜어내는 수)"))
+    elif run_sub:
+        # A를 결과판으로 즉시 옮긴 뒤 낮은 자리부터 차감(모자라면 받아내림)
+        play_steps(sub_steps((A0_o, A0_t, A0_h, A0_k), (B0_o, B0_t, B0_h, B0_k)),
+                   (sub_A, sub_B, res), render_all_sub, {"o": R_O, "t": R_T, "h": R_H, "k": R_K})
 
 # ────────── [학생] 학습 결과 제출하기 ──────────
 with st.expander("📝 학습 결과 제출하기 (교사 대시보드로 전송)", expanded=False):
@@ -780,9 +567,10 @@ with st.expander("📝 학습 결과 제출하기 (교사 대시보드로 전송
         if not nickname.strip():
             st.error("닉네임을 입력해 주세요.")
         else:
-            ts_kst = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+            now_kst = datetime.now(ZoneInfo("Asia/Seoul"))
             row = {
-                "timestamp": ts_kst,
+                "timestamp": now_kst.strftime("%Y-%m-%d %H:%M:%S"),
+                "ts_epoch": int(now_kst.timestamp()),
                 "class": klass,
                 "nickname": nickname.strip(),
                 "quest": quest.strip(),
@@ -796,13 +584,28 @@ with st.expander("📝 학습 결과 제출하기 (교사 대시보드로 전송
                 "guess_correct":  st.session_state.get("last_guess_correct"),
                 "correct_answer": st.session_state.get("last_correct_answer"),
             }
-            add_submission(row)
-            st.success("제출 완료! 교사 대시보드에서 확인할 수 있어요.")
-            # 제출 후 최근 시도값 초기화(선택)
-            st.session_state["last_guess_mode"] = None
-            st.session_state["last_guess_value"] = None
-            st.session_state["last_guess_correct"] = None
-            st.session_state["last_correct_answer"] = None
+            try:
+                ticket = add_submission(row)
+            except queue.Full:
+                ticket = None
+                st.error("제출이 몰려 저장이 밀리고 있어요. 잠시 후 다시 눌러 주세요.")
+            if ticket is not None:
+                # 커밋 확인은 잠깐만 기다림(쓰기 스레드가 묶어서 저장)
+                with timed("app.submit_ack"):
+                    acked = ticket.wait(SUBMIT_ACK_SECONDS)
+                if not acked:
+                    st.info("제출을 받았어요. 저장 중이니 잠시 후 교사 대시보드에서 확인할 수 있어요.")
+                elif ticket.ok:
+                    st.success("제출 완료! 교사 대시보드에서 확인할 수 있어요.")
+                else:
+                    st.error(f"저장에 실패했어요. 다시 제출해 주세요. ({ticket.error})")
+                    ticket = None
+            if ticket is not None:
+                # 제출 후 최근 시도값 초기화(선택)
+                st.session_state["last_guess_mode"] = None
+                st.session_state["last_guess_value"] = None
+                st.session_state["last_guess_correct"] = None
+                st.session_state["last_correct_answer"] = None
 
 # ────────── (교사용) 미니 대시보드 — 필터/상세보기/CSV ──────────
 if st.session_state.get("teacher_ok", False):
@@ -838,79 +641,6 @@ if st.session_state.get("teacher_ok", False):
 
         # 상세보기 선택/표시, CSV 다운로드 등 계속…
 
-
-# ────────── 조회 유틸: 최근 제출 (필터 적용) ──────────
-def fetch_recent(limit=1000, start=None, end=None, classes=None) -> pd.DataFrame:
-    """
-    submissions.db에서 최근 레코드를 읽어옵니다.
-    - start/end: 날짜(date) 필터
-    - classes: 학급 리스트 필터
-    - limit: 최신순으로 최대 N건
-    """
-    conn = get_conn()
-    q = """
-        SELECT
-          id, timestamp, class, nickname, quest,
-          rubric_1, rubric_2, rubric_3, rubric_total,
-          guess_mode, guess_value, guess_correct, correct_answer
-        FROM submissions
-    """
-    df = pd.read_sql_query(q, conn)
-    if df.empty:
-        return df
-
-    df["dt"] = pd.to_datetime(df["timestamp"], errors="coerce")
-    df["date"] = df["dt"].dt.date
-
-    if start is not None:
-        df = df[df["date"] >= start]
-    if end is not None:
-        df = df[df["date"] <= end]
-    if classes:
-        df = df[df["class"].isin(classes)]
-
-    return df.sort_values("dt", ascending=False).head(limit).reset_index(drop=True)
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# ────────── 계측: 이번 실행 전체 시간 ──────────
+if metrics.ENABLED:
+    metrics.observe("app.rerun", (time.perf_counter() - RERUN_T0) * 1000)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# 제출 저장용 백그라운드 쓰기 스레드(묶음 커밋)
+# - 제출 버튼은 큐에 넣기만 하고 바로 돌아감 → 수업 끝 몰림(100+명/분)에도 스크립트 스레드가 DB 잠금을 기다리지 않음
+# - 쓰기 스레드가 연결 풀(db_pool)의 라이터로 큐에 쌓인 행을 한 트랜잭션에 모아 커밋(최대 BATCH_MAX행 / BATCH_WAIT초)
+# - submit()은 Ticket을 돌려줌: 커밋되면 ok=True, 실패하면 error 기록 → 화면에서 "저장 완료"를 확인 가능
+# - 큐는 크기 제한(QUEUE_MAX), 가득 차면 잠시 기다린 뒤 queue.Full
+# - 프로세스 종료(atexit) 시 남은 행을 모두 커밋한 뒤 닫음
+
+import atexit
+import queue
+import threading
+import time
+from typing import List, Optional, Sequence
+
+from db_pool import ConnectionPool
+from metrics import timed
+
+QUEUE_MAX  = 1000    # 대기 행 상한
+BATCH_MAX  = 200     # 한 번에 커밋할 최대 행 수
+BATCH_WAIT = 0.02    # 첫 행을 받은 뒤 더 모으는 시간(초)
+PUT_WAIT   = 2.0     # 큐가 가득 찼을 때 기다리는 시간(초)
+
+class Ticket:
+    """제출 1건의 저장 결과. wait()로 커밋(디스크 반영)까지 기다릴 수 있다."""
+    __slots__ = ("_done", "ok", "error")
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.ok = False
+        self.error: Optional[BaseException] = None
+
+    def _finish(self, error: Optional[BaseException] = None):
+        self.ok = error is None
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """커밋이 끝났으면 True(성공 여부는 ok), 시간 안에 끝나지 않으면 False."""
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+_STOP = object()
+
+class SubmissionWriter:
+    def __init__(self, pool: ConnectionPool, columns: Sequence[str], table: str = "submissions",
+                 queue_max: int = QUEUE_MAX, batch_max: int = BATCH_MAX, batch_wait: float = BATCH_WAIT):
+        self.pool = pool
+        self.columns = tuple(columns)
+        self.insert_sql = (f"INSERT INTO {table} ({', '.join(self.columns)}) "
+                           f"VALUES ({', '.join('?' * len(self.columns))})")
+        self.batch_max = batch_max
+        self.batch_wait = batch_wait
+        self._q: "queue.Queue" = queue.Queue(maxsize=queue_max)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="submission-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ── 스크립트 스레드 ──
+    def submit(self, row: dict, timeout: float = PUT_WAIT) -> Ticket:
+        """행을 큐에 넣고 바로 Ticket을 돌려준다. 큐가 계속 가득 차 있으면 queue.Full."""
+        if self._closed:
+            raise RuntimeError("submission writer is closed")
+        ticket = Ticket()
+        self._q.put((tuple(row.get(c) for c in self.columns), ticket), timeout=timeout)
+        return ticket
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """남은 행을 모두 커밋하고 쓰기 스레드를 멈춘다(여러 번 불러도 안전)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(_STOP)
+        self._thread.join(timeout)
+
+    # ── 쓰기 스레드 ──
+    def _take_batch(self) -> List:
+        batch = [self._q.get()]
+        if batch[0] is _STOP:
+            return batch
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_max:
+            left = deadline - time.monotonic()
+            try:
+                item = self._q.get(timeout=left) if left > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _commit(self, items: List):
+        try:
+            with timed("db.commit_batch"), self.pool.writer() as conn, conn:
+                conn.executemany(self.insert_sql, [params for params, _ in items])
+        except Exception as e:
+            if len(items) == 1:
+                items[0][1]._finish(e)
+                return
+            # 한 행 때문에 묶음 전체가 실패하지 않도록 한 행씩 다시 시도
+            for item in items:
+                self._commit([item])
+        else:
+            for _, ticket in items:
+                ticket._finish()
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            items = [it for it in batch if it is not _STOP]
+            if items:
+                self._commit(items)
+            if len(items) != len(batch):
+                # 종료 신호 뒤에 남은 행까지 마저 커밋
+                rest = []
+                while True:
+                    try:
+                        it = self._q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if it is not _STOP:
+                        rest.append(it)
+                if rest:
+                    self._commit(rest)
+                return
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# 블록 패널 그리기 — 음수 개수(A<B 뺄셈의 결과판)는 빈 패널
+
+import pytest
+
+import blocks3d
+from arith_steps import Milli, sub_steps
+
+@pytest.mark.parametrize("kind", list(blocks3d.DRAWERS))
+def test_negative_count_draws_empty_panel(kind):
+    fig, ax = blocks3d.scene_axes()
+    blocks3d.DRAWERS[kind](ax, -1, blocks3d.KIND_COLORS[kind])
+    assert not ax.collections
+    assert blocks3d.rasterize_panel(kind, -3) == blocks3d.rasterize_panel(kind, 0)
+
+def test_sub_a_less_than_b_renders_every_step():
+    # 0.001 − 0.002: 결과판 0.001자리가 −1이 된다
+    steps = sub_steps(Milli(1).digits(), Milli(2).digits())
+    assert min(min(r) for r in (s.after[2] for s in steps)) < 0
+    for s in steps:
+        for kind, n in zip("OTHK", s.after[2]):
+            assert blocks3d.panel_png(kind, n)